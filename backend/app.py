@@ -1,6 +1,13 @@
 # backend/app.py
-from flask import Flask
+import os
+import threading
+from flask import Flask, jsonify
 from flask_cors import CORS
+from config import Config
+from utils.model_registry import registry, ModelDisabledError
+from utils.sobriety_pool import sobriety_executor
+from utils.blog_feed import start_scheduler as start_blog_feed_scheduler
+from utils.verify_jobs import recover_stale_jobs
 from routes.auth import auth_bp
 from routes.blogs import blogs_bp
 from routes.chat import chat_bp
@@ -9,8 +16,10 @@ from routes.suggest_task import suggest_bp
 from routes.submit_task import submit_bp
 from routes.profile import profile_bp
 from routes.sobriety import sobriety_bp
+from routes.health import health_bp
+from routes.keywords import keywords_bp
 
-def create_app():
+def create_app(debug=False):
     app = Flask(__name__)
     CORS(app)
 
@@ -22,9 +31,33 @@ def create_app():
     app.register_blueprint(submit_bp, url_prefix='/')
     app.register_blueprint(profile_bp, url_prefix='/')
     app.register_blueprint(sobriety_bp, url_prefix='/')
+    app.register_blueprint(health_bp, url_prefix='/')
+    app.register_blueprint(keywords_bp, url_prefix='/')
+
+    @app.errorhandler(ModelDisabledError)
+    def model_disabled(e):
+        return jsonify({"error": str(e)}), 503
+
+    # With the debug reloader, this process only watches files and restarts
+    # the child that serves requests; background work belongs in the child
+    if debug and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        return app
+
+    # Load models in the background so the first requests don't pay for it
+    if Config.MODEL_WARMUP:
+        registry.warmup(background=True)
+        if sobriety_executor is not None:
+            threading.Thread(target=sobriety_executor.start, daemon=True).start()
+
+    # Verification jobs lost in a restart would otherwise hold their tasks in "verifying"
+    threading.Thread(target=recover_stale_jobs, daemon=True).start()
+
+    # Keep the /user/blogs feed warm so page views never wait on Gemini
+    if Config.BLOG_FEED_SCHEDULER:
+        start_blog_feed_scheduler()
 
     return app
 
 if __name__ == '__main__':
-    app = create_app()
+    app = create_app(debug=True)
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
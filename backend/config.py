@@ -5,4 +5,150 @@ load_dotenv()
 
 class Config:
     ADMIN_TOKEN = "A1B2C3"  # Change in production
-    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
\ No newline at end of file
+    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+
+    # Sentiment micro-batching (utils/sentiment.py)
+    SENTIMENT_BATCHING = os.getenv("SENTIMENT_BATCHING", "true").lower() == "true"
+    SENTIMENT_BATCH_WINDOW_MS = float(os.getenv("SENTIMENT_BATCH_WINDOW_MS", "10"))
+    SENTIMENT_MAX_BATCH_SIZE = int(os.getenv("SENTIMENT_MAX_BATCH_SIZE", "16"))
+    SENTIMENT_MAX_QUEUE = int(os.getenv("SENTIMENT_MAX_QUEUE", "1024"))
+
+    # Sentiment / keyword result cache (utils/analysis_cache.py)
+    ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+    ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "4096"))
+    ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", "86400"))
+    ANALYSIS_CACHE_SHARED = os.getenv("ANALYSIS_CACHE_SHARED", "false").lower() == "true"
+
+    # Sentiment inference backend: "torch", "onnx" or "onnx-int8"
+    SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")
+    SENTIMENT_NUM_THREADS = int(os.getenv("SENTIMENT_NUM_THREADS", "0"))  # ONNX Runtime session only; 0 = runtime default
+    MODEL_CACHE_DIR = os.getenv(
+        "MODEL_CACHE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_cache")
+    )
+
+    # Long inputs are scored as overlapping token windows (utils/sentiment.py)
+    SENTIMENT_CHUNKING = os.getenv("SENTIMENT_CHUNKING", "true").lower() == "true"
+    # 510 = the model's 512-token limit minus [CLS]/[SEP]: anything that fits is scored in one pass, as before
+    SENTIMENT_CHUNK_TOKENS = int(os.getenv("SENTIMENT_CHUNK_TOKENS", "510"))
+    SENTIMENT_CHUNK_OVERLAP = int(os.getenv("SENTIMENT_CHUNK_OVERLAP", "64"))
+    SENTIMENT_MAX_WINDOWS = int(os.getenv("SENTIMENT_MAX_WINDOWS", "8"))
+
+    # Model registry (utils/model_registry.py)
+    # Comma-separated subset of "sentiment,clip,haar,asr,chat_embedder"; "all" enables every model
+    _enabled_models = os.getenv("ENABLED_MODELS", "all").strip()
+    ENABLED_MODELS = None if _enabled_models == "all" else [
+        m.strip() for m in _enabled_models.split(",") if m.strip()
+    ]
+    MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() == "true"
+    # torch's thread pool is process-wide (CLIP, Whisper, torch sentiment, chat embedder); 0 = torch default
+    TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", "0"))
+
+    # CLIP photo verification (utils/verify.py)
+    CLIP_TASK_EMBED_CACHE_SIZE = int(os.getenv("CLIP_TASK_EMBED_CACHE_SIZE", "1024"))
+    CLIP_PRECISION = os.getenv("CLIP_PRECISION", "fp32")  # "fp32", "int8" or "bf16"
+
+    # Async batched photo verification (utils/verify_jobs.py)
+    VERIFY_ASYNC = os.getenv("VERIFY_ASYNC", "false").lower() == "true"  # default mode for /api/submit-task
+    VERIFY_BATCH_SIZE = int(os.getenv("VERIFY_BATCH_SIZE", "8"))
+    VERIFY_BATCH_WINDOW_MS = float(os.getenv("VERIFY_BATCH_WINDOW_MS", "50"))
+    VERIFY_WORKERS = int(os.getenv("VERIFY_WORKERS", "1"))
+    VERIFY_MAX_QUEUE = int(os.getenv("VERIFY_MAX_QUEUE", "256"))
+    VERIFY_JOB_STALE_SECONDS = int(os.getenv("VERIFY_JOB_STALE_SECONDS", "600"))  # queued longer = lost
+
+    # Upload ingest (utils/image_ingest.py)
+    VERIFY_IMAGE_MIN_SIDE = int(os.getenv("VERIFY_IMAGE_MIN_SIDE", "224"))      # CLIP input size
+    SOBRIETY_IMAGE_MAX_SIDE = int(os.getenv("SOBRIETY_IMAGE_MAX_SIDE", "1024"))  # enough for Haar + eye ROIs
+    PERSIST_TASK_PHOTOS = os.getenv("PERSIST_TASK_PHOTOS", "true").lower() == "true"
+    PERSIST_SELFIES = os.getenv("PERSIST_SELFIES", "false").lower() == "true"
+
+    # Perceptual-hash verdict cache for resubmitted photos (utils/verdict_cache.py)
+    VERDICT_CACHE_ENABLED = os.getenv("VERDICT_CACHE_ENABLED", "true").lower() == "true"
+    VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "4096"))
+    VERDICT_CACHE_MAX_DISTANCE = int(os.getenv("VERDICT_CACHE_MAX_DISTANCE", "4"))  # Hamming bits out of 64
+
+    # Approved-photo CLIP embedding store (utils/embedding_store.py)
+    EMBEDDING_STORE_ENABLED = os.getenv("EMBEDDING_STORE_ENABLED", "true").lower() == "true"
+    EMBEDDING_STORE_DIR = os.getenv(
+        "EMBEDDING_STORE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "embedding_store")
+    )
+    REUSE_SIMILARITY_THRESHOLD = float(os.getenv("REUSE_SIMILARITY_THRESHOLD", "0.95"))
+    REUSE_SEARCH_K = int(os.getenv("REUSE_SEARCH_K", "5"))
+
+    # Sobriety check (utils/sobriety.py)
+    SOBRIETY_DETECT_MAX_SIDE = int(os.getenv("SOBRIETY_DETECT_MAX_SIDE", "480"))  # face detection runs at this size
+    SOBRIETY_MAX_FRAMES = int(os.getenv("SOBRIETY_MAX_FRAMES", "16"))
+    SOBRIETY_CLIP_MAX_BYTES = int(os.getenv("SOBRIETY_CLIP_MAX_BYTES", str(20 * 1024 * 1024)))
+    SOBRIETY_CLIP_MAX_SECONDS = float(os.getenv("SOBRIETY_CLIP_MAX_SECONDS", "10"))  # frames sampled from this span
+    SOBRIETY_TRACK_MIN_SCORE = float(os.getenv("SOBRIETY_TRACK_MIN_SCORE", "0.6"))
+    SOBRIETY_FAST_PATH = os.getenv("SOBRIETY_FAST_PATH", "true").lower() == "true"
+
+    # Sobriety process pool (utils/sobriety_pool.py); 0 runs analysis inline, "auto" = one per core
+    _sobriety_pool_size = os.getenv("SOBRIETY_POOL_SIZE", "0")
+    SOBRIETY_POOL_SIZE = (os.cpu_count() or 1) if _sobriety_pool_size == "auto" else int(_sobriety_pool_size)
+    SOBRIETY_POOL_TIMEOUT = float(os.getenv("SOBRIETY_POOL_TIMEOUT", "10"))
+    SOBRIETY_POOL_MAX_PENDING = int(os.getenv("SOBRIETY_POOL_MAX_PENDING", "0"))  # 0 = 2 × pool size
+
+    # Sobriety once-per-day admission cache (utils/sobriety_limit.py)
+    SOBRIETY_LIMIT_CACHE_SIZE = int(os.getenv("SOBRIETY_LIMIT_CACHE_SIZE", "10000"))
+    SOBRIETY_LIMIT_CACHE_TTL = int(os.getenv("SOBRIETY_LIMIT_CACHE_TTL", "3600"))
+
+    # Per-user sobriety baseline (utils/sobriety_baseline.py)
+    SOBRIETY_BASELINE_FLAGS = os.getenv("SOBRIETY_BASELINE_FLAGS", "false").lower() == "true"
+    SOBRIETY_BASELINE_Z = float(os.getenv("SOBRIETY_BASELINE_Z", "2.5"))
+    SOBRIETY_BASELINE_MIN_SAMPLES = int(os.getenv("SOBRIETY_BASELINE_MIN_SAMPLES", "5"))
+    SOBRIETY_RESULTS_KEEP = int(os.getenv("SOBRIETY_RESULTS_KEEP", "0"))  # 0 = keep every result
+
+    # Speech-to-text (utils/voice.py): "whisper" (local, CPU) or "google" (network)
+    ASR_BACKEND = os.getenv("ASR_BACKEND", "whisper")
+    ASR_MODEL = os.getenv("ASR_MODEL", "openai/whisper-tiny.en")
+    ASR_CHUNK_SECONDS = int(os.getenv("ASR_CHUNK_SECONDS", "30"))
+    ASR_BATCHING = os.getenv("ASR_BATCHING", "true").lower() == "true"
+    ASR_BATCH_WINDOW_MS = float(os.getenv("ASR_BATCH_WINDOW_MS", "50"))
+    ASR_MAX_BATCH_SIZE = int(os.getenv("ASR_MAX_BATCH_SIZE", "4"))
+
+    # Voice note decoding (utils/voice.py); ffmpeg reads and writes through pipes
+    FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+    VOICE_MAX_SECONDS = int(os.getenv("VOICE_MAX_SECONDS", "120"))
+    VOICE_MAX_BYTES = int(os.getenv("VOICE_MAX_BYTES", str(10 * 1024 * 1024)))
+    VOICE_DECODE_TIMEOUT = float(os.getenv("VOICE_DECODE_TIMEOUT", "15"))
+
+    # Risk keyword lexicon (utils/keywords.py): "builtin", "file" (JSON) or "db" (keyword_lexicon collection)
+    KEYWORD_LEXICON_SOURCE = os.getenv("KEYWORD_LEXICON_SOURCE", "builtin")
+    KEYWORD_LEXICON_FILE = os.getenv("KEYWORD_LEXICON_FILE", "keyword_lexicon.json")
+    KEYWORD_LEXICON_RELOAD_SECONDS = float(os.getenv("KEYWORD_LEXICON_RELOAD_SECONDS", "60"))  # 0 = manual reload only
+
+    # Cached /user/blogs feed (utils/blog_feed.py), served stale-while-revalidate
+    BLOG_FEED_TTL = int(os.getenv("BLOG_FEED_TTL", "1800"))
+    BLOG_FEED_REFRESH_SECONDS = int(os.getenv("BLOG_FEED_REFRESH_SECONDS", "300"))
+    BLOG_FEED_LEASE_SECONDS = int(os.getenv("BLOG_FEED_LEASE_SECONDS", "300"))
+    BLOG_FEED_SCHEDULER = os.getenv("BLOG_FEED_SCHEDULER", "true").lower() == "true"
+    BLOG_FEED_COLD_WAIT_SECONDS = float(os.getenv("BLOG_FEED_COLD_WAIT_SECONDS", "10"))  # cold miss, another process refreshing
+    BLOG_FEED_RETRY_SECONDS = int(os.getenv("BLOG_FEED_RETRY_SECONDS", "30"))  # first backoff after a failed refresh, doubles
+    BLOG_FEED_RETRY_MAX_SECONDS = int(os.getenv("BLOG_FEED_RETRY_MAX_SECONDS", "1800"))
+
+    # Blog ingestion (utils/blog_helper.py): comma-separated RSS/Atom feed URLs
+    BLOG_FEEDS = [
+        url.strip()
+        for url in os.getenv("BLOG_FEEDS", "https://www.reddit.com/r/stopdrinking/.rss").split(",")
+        if url.strip()
+    ]
+    BLOG_FEED_ENTRIES = int(os.getenv("BLOG_FEED_ENTRIES", "5"))  # newest entries taken per feed
+    BLOG_REWRITE_CONCURRENCY = int(os.getenv("BLOG_REWRITE_CONCURRENCY", "5"))
+    BLOG_REWRITE_TIMEOUT = float(os.getenv("BLOG_REWRITE_TIMEOUT", "30"))
+    BLOG_REWRITE_MAX_ATTEMPTS = int(os.getenv("BLOG_REWRITE_MAX_ATTEMPTS", "3"))
+
+    # Chat context compaction (utils/chat_context.py): running summary + last few raw turns
+    CHAT_COMPACTION = os.getenv("CHAT_COMPACTION", "false").lower() == "true"
+    CHAT_SUMMARY_EVERY = int(os.getenv("CHAT_SUMMARY_EVERY", "4"))   # turns folded into the summary at a time
+    CHAT_RECENT_TURNS = int(os.getenv("CHAT_RECENT_TURNS", "3"))     # raw turns always kept
+    # Share of compacted replies whose raw vs compacted prompt tokens are logged (two count_tokens calls each)
+    CHAT_LOG_TOKENS_SAMPLE = float(os.getenv("CHAT_LOG_TOKENS_SAMPLE", "0.1"))
+
+    # Semantic cache for first-turn chat messages (utils/semantic_cache.py)
+    CHAT_SEMANTIC_CACHE = os.getenv("CHAT_SEMANTIC_CACHE", "false").lower() == "true"
+    CHAT_CACHE_MODEL = os.getenv("CHAT_CACHE_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    CHAT_CACHE_THRESHOLD = float(os.getenv("CHAT_CACHE_THRESHOLD", "0.92"))  # cosine similarity
+    CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "2048"))
+    CHAT_CACHE_TTL = int(os.getenv("CHAT_CACHE_TTL", "86400"))
@@ -1,32 +1,120 @@
 # backend/models/blog.py
+import base64
 from datetime import datetime
 from bson import ObjectId
 from utils.db import blogs_collection
 
+# Newest first; _id breaks ties so keyset pages never skip or repeat a blog
+SORT = [("published_at", -1), ("_id", -1)]
+
+try:
+    blogs_collection.create_index(SORT)
+except Exception as e:
+    print(f"Could not create blogs index: {e}")
+
+# Fields returned by list_page() when the caller does not pick any
+LIST_FIELDS = ["title", "excerpt", "author", "date", "readTime", "link", "published_at"]
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class MigrationRequiredError(RuntimeError):
+    """Raised while some blogs still lack published_at (run scripts/migrate_blog_dates.py)."""
+
+
+_dates_migrated = False
+
+
+def ensure_dates_migrated():
+    """
+    Keyset pages are only correct when every blog has published_at: blogs
+    without it sort last and never match the cursor filter. Checked until
+    it first passes, then remembered for the life of the process.
+    """
+    global _dates_migrated
+    if _dates_migrated:
+        return
+    if blogs_collection.find_one({"published_at": {"$exists": False}}, {"_id": 1}):
+        raise MigrationRequiredError(
+            "Some blogs have no published_at yet; run `python -m scripts.migrate_blog_dates` from backend/"
+        )
+    _dates_migrated = True
+
+
+def encode_cursor(blog):
+    raw = f"{blog['published_at'].isoformat()}|{blog['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        published_at, blog_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(published_at), ObjectId(blog_id)
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
+
+
+def _serialize(blog):
+    blog["_id"] = str(blog["_id"])
+    if isinstance(blog.get("published_at"), datetime):
+        blog["published_at"] = blog["published_at"].isoformat() + "Z"
+    return blog
+
+
 class Blog:
     @staticmethod
     def get_all(limit=None):
-        query = blogs_collection.find().sort("date", -1)
+        query = blogs_collection.find().sort(SORT)
         if limit:
             query = query.limit(limit)
-        return [{**blog, "_id": str(blog["_id"])} for blog in query]
+        return [_serialize(blog) for blog in query]
+
+    @staticmethod
+    def list_page(limit=20, cursor=None, fields=None):
+        """
+        One page of blogs, newest first, using keyset pagination on the
+        (published_at, _id) index: the cursor marks where the previous page
+        ended, so every page costs the same however deep it is.
+        Returns (blogs, next_cursor); next_cursor is None on the last page.
+        Raises MigrationRequiredError until every blog has published_at.
+        """
+        ensure_dates_migrated()
+        query = {}
+        if cursor:
+            published_at, blog_id = decode_cursor(cursor)
+            query = {"$or": [
+                {"published_at": {"$lt": published_at}},
+                {"published_at": published_at, "_id": {"$lt": blog_id}}
+            ]}
+
+        # published_at is always fetched: the next cursor is built from it
+        projection = {field: 1 for field in (fields or LIST_FIELDS)}
+        projection["published_at"] = 1
+
+        page = list(blogs_collection.find(query, projection).sort(SORT).limit(limit + 1))
+        next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+        return [_serialize(blog) for blog in page[:limit]], next_cursor
 
     @staticmethod
     def create(title, excerpt, author, link=None):
+        now = datetime.utcnow()
         blog = {
             "title": title,
             "excerpt": excerpt,
             "author": author,
-            "date": datetime.now().strftime("%b %d, %Y"),
+            "date": now.strftime("%b %d, %Y"),
+            "published_at": now,
             "readTime": f"{(len(excerpt.split()) // 200) + 1} min read",
             "link": link or None
         }
-        result = blogs_collection.insert_one(blog)
-        blog["_id"] = str(result.inserted_id)
-        return blog
+        blogs_collection.insert_one(blog)
+        return _serialize(blog)
 
     @staticmethod
     def update(blog_id, title, excerpt, link=None):
+        now = datetime.utcnow()
         result = blogs_collection.find_one_and_update(
             {"_id": ObjectId(blog_id)},
             {
@@ -34,14 +122,15 @@ class Blog:
                     "title": title,
                     "excerpt": excerpt,
                     "link": link or None,
-                    "date": datetime.now().strftime("%b %d, %Y"),
+                    "date": now.strftime("%b %d, %Y"),
+                    "published_at": now,
                     "readTime": f"{(len(excerpt.split()) // 200) + 1} min read"
                 }
             },
             return_document=True
         )
         if result:
-            result["_id"] = str(result["_id"])
+            result = _serialize(result)
         return result
 
     @staticmethod
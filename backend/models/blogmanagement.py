@@ -6,22 +6,28 @@ from utils.db import blogs_collection
 class BlogManagement:
     @staticmethod
     def get_all(limit=None):
-        query = blogs_collection.find().sort("date", -1)
+        query = blogs_collection.find().sort([("published_at", -1), ("_id", -1)])
         if limit:
             query = query.limit(limit)
-        return [{**blog, "_id": str(blog["_id"])} for blog in query]
+        return [
+            {**blog, "_id": str(blog["_id"]), "published_at": blog["published_at"].isoformat() + "Z" if blog.get("published_at") else None}
+            for blog in query
+        ]
 
     @staticmethod
     def create(title, excerpt, author):
+        now = datetime.utcnow()
         blog = {
             "title": title,
             "excerpt": excerpt,
             "author": author,
-            "date": datetime.now().strftime("%b %d, %Y"),
+            "date": now.strftime("%b %d, %Y"),
+            "published_at": now,
             "readTime": f"{(len(excerpt.split()) // 200) + 1} min read"
         }
         result = blogs_collection.insert_one(blog)
         blog["_id"] = str(result.inserted_id)
+        blog["published_at"] = now.isoformat() + "Z"
         return blog
 
     @staticmethod
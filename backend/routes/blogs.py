@@ -1,9 +1,9 @@
 # backend/routes/blogs.py
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
-from models.blog import Blog
+from models.blog import Blog, InvalidCursorError, MigrationRequiredError
 from models.user import User
-from utils.blog_helper import generate_blog_from_source
+from utils.blog_feed import get_feed, get_feed_stats
 
 blogs_bp = Blueprint('blogs', __name__)
 
@@ -11,20 +11,45 @@ blogs_bp = Blueprint('blogs', __name__)
 @blogs_bp.route('/user/blogs', methods=['GET'])
 def get_user_blogs():
     """
-    Fetch real recovery stories from web → Gemini-rewrite → return
+    Real recovery stories from the web, Gemini-rewritten. Served from the
+    cached feed (stale-while-revalidate); see utils/blog_feed.py.
     """
     try:
-        blogs = generate_blog_from_source()
-        return jsonify(blogs), 200
+        blogs, state, age = get_feed()
+        headers = {"X-Cache": state}
+        if age is not None:
+            headers["Age"] = str(int(age))
+        return jsonify(blogs), 200, headers
     except Exception as e:
         print(f"Error fetching blogs: {e}")
         return jsonify([]), 200  # Return empty list on error
 
-# GET: All blogs for admin (full list)
+# GET: Blog feed cache metrics
+@blogs_bp.route('/user/blogs/stats', methods=['GET'])
+def get_user_blogs_stats():
+    return jsonify(get_feed_stats()), 200
+
+# GET: Blogs for admin, one page at a time (newest first)
 @blogs_bp.route('/admin/blogs', methods=['GET'])
 def get_admin_blogs():
-    blogs = Blog.get_all()
-    return jsonify(blogs), 200
+    """
+    Query params:
+      - limit: page size (default 20, max 100)
+      - cursor: next_cursor from the previous page
+      - fields: comma-separated fields to return (default: all list fields)
+    """
+    limit = min(max(request.args.get('limit', default=20, type=int), 1), 100)
+    cursor = request.args.get('cursor')
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or None
+
+    try:
+        blogs, next_cursor = Blog.list_page(limit=limit, cursor=cursor, fields=fields)
+    except InvalidCursorError as e:
+        return jsonify({"message": str(e)}), 400
+    except MigrationRequiredError as e:
+        print(f"Admin blogs unavailable: {e}")
+        return jsonify({"message": str(e)}), 503
+    return jsonify({"blogs": blogs, "next_cursor": next_cursor}), 200
 
 # POST: Add a new blog (admin only)
 @blogs_bp.route('/admin/blogs', methods=['POST'])
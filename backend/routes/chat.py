@@ -1,36 +1,14 @@
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from datetime import datetime
 from utils.db import users_collection
-from utils.gemini_chatbot import get_chat_response
+from utils.gemini_chatbot import FALLBACK_REPLY, get_chat_response, stream_chat_response
+from utils.chat_context import after_reply, build_history
+from utils.semantic_cache import find_reply, get_chat_cache_stats, remember_reply
 
 chat_bp = Blueprint('chat', __name__)
 
-@chat_bp.route('/api/chat', methods=['POST'])
-def chat():
-    data = request.get_json()
-
-    user_id = data.get('user_id')
-    message = data.get('message', '').strip()
-
-    if not user_id or not message:
-        return jsonify({"error": "user_id and message are required"}), 400
-
-    # 📥 Fetch existing chat history (last 10 messages)
-    user_doc = users_collection.find_one(
-        {"user_id": user_id},
-        {"chat_history": {"$slice": -10}}
-    )
-
-    gemini_history = []
-    if user_doc and (chats := user_doc.get("chat_history")):
-        for entry in chats:
-            gemini_history.append({"role": "user", "parts": [entry["user"]]})
-            gemini_history.append({"role": "model", "parts": [entry["bot"]]})
-
-    # 🤖 Call Gemini (stub function for now)
-    bot_reply = get_chat_response(message, chat_history=gemini_history)
-
-    # Save chat entry
+def save_chat(user_id, message, bot_reply):
     chat_entry = {
         "timestamp": datetime.utcnow(),
         "user": message,
@@ -41,15 +19,97 @@ def chat():
         {"user_id": user_id},
         {
             "$setOnInsert": {"created_at": datetime.utcnow()},
+            "$inc": {"chat_turns": 1},
             "$push": {
                 "chat_history": {"$each": [chat_entry], "$slice": -50}
             }
         },
         upsert=True
     )
+    return chat_entry
+
+@chat_bp.route('/api/chat', methods=['POST'])
+def chat():
+    data = request.get_json()
+
+    user_id = data.get('user_id')
+    message = data.get('message', '').strip()
+
+    if not user_id or not message:
+        return jsonify({"error": "user_id and message are required"}), 400
+
+    # 📥 Recent history (or summary + recent turns when compaction is on)
+    history, context = build_history(user_id)
+
+    # ♻️ First-turn questions may already have a cached answer
+    bot_reply, embedding = find_reply(message, history)
+
+    # 🤖 Call Gemini
+    if bot_reply is None:
+        bot_reply = get_chat_response(message, chat_history=history)
+        if bot_reply != FALLBACK_REPLY:
+            remember_reply(embedding, message, bot_reply)
+
+    # Save chat entry
+    chat_entry = save_chat(user_id, message, bot_reply)
+    after_reply(user_id, message, history, context)
 
     return jsonify({
         "user_id": user_id,
         "reply": bot_reply,
         "timestamp": chat_entry["timestamp"].isoformat() + "Z"
     }), 200
+
+@chat_bp.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Same as /api/chat, but the reply is relayed as Server-Sent Events
+    while Gemini generates it:
+      data: {"delta": "..."}                       (repeated)
+      event: done
+      data: {"user_id", "reply", "timestamp"}      (after history is saved)
+    """
+    data = request.get_json()
+
+    user_id = data.get('user_id')
+    message = data.get('message', '').strip()
+
+    if not user_id or not message:
+        return jsonify({"error": "user_id and message are required"}), 400
+
+    history, context = build_history(user_id)
+
+    def events():
+        cached_reply, embedding = find_reply(message, history)
+        if cached_reply is not None:
+            bot_reply = cached_reply
+            yield f"data: {json.dumps({'delta': cached_reply})}\n\n"
+        else:
+            parts, outcome = [], {}
+            for delta in stream_chat_response(message, chat_history=history, outcome=outcome):
+                parts.append(delta)
+                yield f"data: {json.dumps({'delta': delta})}\n\n"
+            bot_reply = "".join(parts).strip()
+            # A reply cut off mid-stream must never be served to other users
+            if outcome["complete"]:
+                remember_reply(embedding, message, bot_reply)
+
+        # Persist once the whole reply is known
+        chat_entry = save_chat(user_id, message, bot_reply)
+        after_reply(user_id, message, history, context)
+        done = {
+            "user_id": user_id,
+            "reply": bot_reply,
+            "timestamp": chat_entry["timestamp"].isoformat() + "Z"
+        }
+        yield f"event: done\ndata: {json.dumps(done)}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@chat_bp.route('/api/chat/stats', methods=['GET'])
+def chat_stats():
+    return jsonify({"semantic_cache": get_chat_cache_stats()}), 200
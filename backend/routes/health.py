@@ -0,0 +1,29 @@
+# backend/routes/health.py
+from flask import Blueprint, jsonify
+from config import Config
+from utils.model_registry import registry
+
+health_bp = Blueprint('health', __name__)
+
+# Liveness: the process is up and serving requests
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({"status": "ok", "models": registry.status()}), 200
+
+# Readiness:
+# - warmup mode: ready once every enabled model has loaded
+# - lazy mode (MODEL_WARMUP off): models load on first use, so not-yet-loaded
+#   models don't count against readiness, but a model that failed to load does
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    models = registry.status()
+    if Config.MODEL_WARMUP:
+        ready = registry.ready()
+    else:
+        ready = not any(state["state"] == "failed" for state in models.values())
+    return jsonify({
+        "ready": ready,
+        "mode": "warmup" if Config.MODEL_WARMUP else "lazy",
+        "warmup": Config.MODEL_WARMUP,
+        "models": models
+    }), 200 if ready else 503
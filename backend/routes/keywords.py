@@ -0,0 +1,28 @@
+# routes/keywords.py
+from flask import Blueprint, request, jsonify
+from models.user import User
+from utils.keywords import get_lexicon_status, reload_lexicon
+
+keywords_bp = Blueprint('keywords', __name__)
+
+# GET: Active keyword lexicon (source, version, size)
+@keywords_bp.route('/admin/keywords', methods=['GET'])
+def keyword_lexicon_status():
+    return jsonify(get_lexicon_status()), 200
+
+# POST: Reload the keyword lexicon from its source (admin only)
+@keywords_bp.route('/admin/keywords/reload', methods=['POST'])
+def reload_keyword_lexicon():
+    data = request.json or {}
+    username = data.get("username")
+
+    # Verify admin
+    user = User.find_by_username(username)
+    if not user or user.get("role") != "admin":
+        return jsonify({"message": "Unauthorized: Admins only"}), 403
+
+    try:
+        status = reload_lexicon()
+    except Exception as e:
+        return jsonify({"message": f"Reload failed, previous lexicon kept: {str(e)}"}), 400
+    return jsonify(status), 200
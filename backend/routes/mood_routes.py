@@ -1,10 +1,13 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
-import uuid, os
 from utils.db import users_collection
-from utils.sentiment import analyze_sentiment
-from utils.voice import convert_voice_to_text
+from utils.sentiment import analyze_sentiment, get_batching_stats
+from utils.voice import (
+    AudioDecoderUnavailableError, AudioTooLongError, InvalidAudioError, convert_voice_to_text, get_asr_stats,
+)
+from utils.image_ingest import read_upload
 from utils.keywords import check_keywords
+from utils.analysis_cache import get_cache_stats
 
 mood_bp = Blueprint("mood", __name__)
 
@@ -22,11 +25,15 @@ def analyze_input():
     voice_file = request.files.get('voice')
     voice_text = ""
     if voice_file:
-        filename = f"uploads/{user_id}_{uuid.uuid4().hex}.ogg"
-        os.makedirs("uploads", exist_ok=True)
-        voice_file.save(filename)
-        voice_text = convert_voice_to_text(filename)
-        os.remove(filename)
+        # Transcoded and transcribed in memory; nothing is written to uploads/
+        try:
+            voice_text = convert_voice_to_text(read_upload(voice_file))
+        except AudioTooLongError as e:
+            return jsonify({"error": str(e)}), 413
+        except InvalidAudioError as e:
+            return jsonify({"error": str(e)}), 400
+        except AudioDecoderUnavailableError as e:
+            return jsonify({"error": str(e)}), 503
 
     full_text = " ".join(filter(None, [text_input, voice_text, *questionnaire]))
     if not full_text.strip():
@@ -69,3 +76,12 @@ def analyze_input():
         "emotion": sentiment_result["emotion"],
         "timestamp": mood_entry["timestamp"].isoformat()
     }), 200
+
+
+@mood_bp.route('/api/analyze/stats', methods=['GET'])
+def analyze_stats():
+    return jsonify({
+        "batching": get_batching_stats(),
+        "cache": get_cache_stats(),
+        "asr": get_asr_stats()
+    }), 200
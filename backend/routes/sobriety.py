@@ -1,14 +1,48 @@
 # backend/routes/sobriety.py
 from flask import Blueprint, request, jsonify
-from datetime import datetime, timedelta
+from datetime import datetime
 import uuid
 import os
 from werkzeug.utils import secure_filename
-from utils.sobriety import analyze_sobriety  # ← Import from your module
+from utils.sobriety import decode_video_frames  # ← Import from your module
+from utils.sobriety_pool import AnalysisTimeoutError, PoolBusyError, get_pool_stats, run_sobriety
 from utils.db import users_collection
+from utils.sobriety_limit import get_limit_stats, hours_until_allowed, record_check
+from utils.sobriety_baseline import check_metrics, deviation_flags, deviations, summarize, update_baseline
+from utils.model_registry import ModelDisabledError
+from utils.image_ingest import InvalidImageError, UploadTooLargeError, decode_image, read_upload, to_bgr_array
+from config import Config
 
 sobriety_bp = Blueprint('sobriety', __name__)
 
+BASELINE_UPDATE_ATTEMPTS = 5
+
+def rate_limited(hours_left):
+    return jsonify({
+        "error": "Sobriety check available once per day",
+        "available_in_hours": hours_left
+    }), 429  # Too Many Requests
+
+def save_baseline(user_id, baseline, metrics, is_sober, checked_at):
+    """
+    Fold one check into the stored baseline. The write only applies if the
+    baseline is still the one that was read (same "count"); if another
+    request got there first, re-read and fold into its result instead, so
+    concurrent checks never overwrite each other's samples.
+    """
+    for _ in range(BASELINE_UPDATE_ATTEMPTS):
+        current = {"sobriety_baseline.count": baseline["count"]} if baseline else {"sobriety_baseline": None}
+        updated = users_collection.update_one(
+            {"user_id": user_id, **current},
+            {"$set": {"sobriety_baseline": update_baseline(baseline, metrics, is_sober, checked_at)}}
+        )
+        if updated.matched_count:
+            return True
+        user = users_collection.find_one({"user_id": user_id}, {"_id": 0, "sobriety_baseline": 1})
+        baseline = user.get("sobriety_baseline") if user else None
+    print(f"Sobriety baseline for {user_id} not updated after {BASELINE_UPDATE_ATTEMPTS} attempts")
+    return False
+
 @sobriety_bp.route('/api/sobriety-check', methods=['POST'])
 def sobriety_check():
     """
@@ -16,85 +50,142 @@ def sobriety_check():
     Form-data:
       - user_id: string
       - selfie: image file
+        or frames[]: a short burst of image files
+        or clip: a short video file
+    Query string (or X-User-Id header):
+      - user_id: lets the once-per-day limit be enforced before the upload is read
     Returns sobriety analysis (once per day)
     """
-    user_id = request.form.get('user_id')
+    # -------------------------------
+    # Rate Limit: Once per 24 hours
+    # -------------------------------
+    # Checked before touching request.form so a rejected call never buffers the upload
+    early_user_id = request.args.get('user_id') or request.headers.get('X-User-Id')
+    if early_user_id:
+        hours_left = hours_until_allowed(early_user_id)
+        if hours_left is not None:
+            return rate_limited(hours_left)
+
+    user_id = request.form.get('user_id') or early_user_id
     image_file = request.files.get('selfie')
+    frame_files = request.files.getlist('frames[]')
+    clip_file = request.files.get('clip')
 
     if not user_id:
         return jsonify({"error": "user_id is required"}), 400
-    if not image_file:
+    if not (image_file or frame_files or clip_file):
         return jsonify({"error": "selfie image is required"}), 400
 
     # Validate file extension
     allowed_extensions = {'jpg', 'jpeg', 'png'}
-    filename = image_file.filename.lower()
-    if not any(filename.endswith(ext) for ext in allowed_extensions):
-        return jsonify({"error": "Only .jpg, .jpeg, .png images allowed"}), 400
+    for upload in ([image_file] if image_file else []) + frame_files:
+        filename = upload.filename.lower()
+        if not any(filename.endswith(ext) for ext in allowed_extensions):
+            return jsonify({"error": "Only .jpg, .jpeg, .png images allowed"}), 400
+    if clip_file and not clip_file.filename.lower().endswith(('.mp4', '.mov', '.webm')):
+        return jsonify({"error": "Only .mp4, .mov, .webm clips allowed"}), 400
+
+    if early_user_id and user_id != early_user_id:
+        return jsonify({"error": "user_id does not match"}), 400
+
+    # Older clients only send user_id in the form body
+    if not early_user_id:
+        hours_left = hours_until_allowed(user_id)
+        if hours_left is not None:
+            return rate_limited(hours_left)
 
     # -------------------------------
-    # Rate Limit: Once per 24 hours
+    # Multi-frame mode: burst of frames or a short clip
     # -------------------------------
-    user = users_collection.find_one({"user_id": user_id})
-    if user and "last_sobriety_check" in user:
-        last_check = user["last_sobriety_check"]
-        next_allowed = last_check + timedelta(days=1)
-        now = datetime.utcnow()
-        if now < next_allowed:
-            hours_left = int((next_allowed - now).total_seconds() // 3600)
-            return jsonify({
-                "error": "Sobriety check available once per day",
-                "available_in_hours": max(1, hours_left)
-            }), 429  # Too Many Requests
+    if frame_files or clip_file:
+        try:
+            if clip_file:
+                frames = decode_video_frames(
+                    read_upload(clip_file, max_bytes=Config.SOBRIETY_CLIP_MAX_BYTES),
+                    Config.SOBRIETY_MAX_FRAMES,
+                    Config.SOBRIETY_IMAGE_MAX_SIDE,
+                    max_seconds=Config.SOBRIETY_CLIP_MAX_SECONDS
+                )
+            else:
+                frames = [
+                    to_bgr_array(decode_image(read_upload(f), max_side=Config.SOBRIETY_IMAGE_MAX_SIDE))
+                    for f in frame_files[:Config.SOBRIETY_MAX_FRAMES]
+                ]
+        except UploadTooLargeError as e:
+            return jsonify({"error": str(e)}), 413
+        except InvalidImageError as e:
+            return jsonify({"error": str(e)}), 400
+        if not frames:
+            return jsonify({"error": "Could not decode any frames"}), 400
+        analyze = lambda: run_sobriety(frames=frames)
 
     # -------------------------------
-    # Save Image Temporarily
+    # Decode Image In Memory (downscaled, upright)
     # -------------------------------
-    os.makedirs("uploads/selfies", exist_ok=True)
-    file_ext = os.path.splitext(filename)[1]
-    safe_filename = f"{uuid.uuid4().hex}{file_ext}"
-    filepath = os.path.join("uploads/selfies", safe_filename)
+    else:
+        data = read_upload(image_file)
+        try:
+            image = to_bgr_array(decode_image(data, max_side=Config.SOBRIETY_IMAGE_MAX_SIDE))
+        except InvalidImageError as e:
+            return jsonify({"error": str(e)}), 400
 
-    try:
-        image_file.save(filepath)
-    except Exception as e:
-        return jsonify({"error": f"Failed to save image: {str(e)}"}), 500
+        # Keeping the original selfie is opt-in
+        if Config.PERSIST_SELFIES:
+            os.makedirs("uploads/selfies", exist_ok=True)
+            file_ext = os.path.splitext(image_file.filename.lower())[1]
+            safe_filename = f"{uuid.uuid4().hex}{file_ext}"
+            try:
+                with open(os.path.join("uploads/selfies", safe_filename), "wb") as f:
+                    f.write(data)
+            except Exception as e:
+                return jsonify({"error": f"Failed to save image: {str(e)}"}), 500
+        analyze = lambda: run_sobriety(image=image)
 
     # -------------------------------
     # Analyze Sobriety
     # -------------------------------
     try:
-        result = analyze_sobriety(filepath)
+        result = analyze()
         if "error" in result:
-            # Clean up
-            if os.path.exists(filepath):
-                os.remove(filepath)
             return jsonify(result), 400
 
+        # -------------------------------
+        # Compare Against the User's Own Baseline
+        # -------------------------------
+        user = users_collection.find_one({"user_id": user_id}, {"_id": 0, "sobriety_baseline": 1})
+        baseline = user.get("sobriety_baseline") if user else None
+        metrics = check_metrics(result["image_analysis"])
+        z_scores = deviations(baseline, metrics, Config.SOBRIETY_BASELINE_MIN_SAMPLES)
+        if z_scores:
+            result["image_analysis"]["baseline_z"] = z_scores
+        if Config.SOBRIETY_BASELINE_FLAGS:
+            result["flags"] += deviation_flags(z_scores, Config.SOBRIETY_BASELINE_Z)
+            result["is_sober"] = len(result["flags"]) == 0
+
         # -------------------------------
         # Save Result to MongoDB
         # -------------------------------
+        checked_at = datetime.utcnow()
         sobriety_entry = {
-            "timestamp": datetime.utcnow(),
+            "timestamp": checked_at,
             "is_sober": result["is_sober"],
             "flags": result["flags"],
             "image_analysis": result["image_analysis"]
         }
 
+        push = {"$each": [sobriety_entry]}
+        if Config.SOBRIETY_RESULTS_KEEP > 0:
+            push["$slice"] = -Config.SOBRIETY_RESULTS_KEEP
         users_collection.update_one(
             {"user_id": user_id},
             {
-                "$set": {"last_sobriety_check": datetime.utcnow()},
-                "$push": {"sobriety_results": sobriety_entry}
+                "$set": {"last_sobriety_check": checked_at},
+                "$push": {"sobriety_results": push}
             },
             upsert=True
         )
-
-        # -------------------------------
-        # Clean Up: Delete Image After Analysis
-        # -------------------------------
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        save_baseline(user_id, baseline, metrics, result["is_sober"], checked_at)
+        record_check(user_id, checked_at)
 
         # -------------------------------
         # Return Success Response
@@ -107,8 +198,43 @@ def sobriety_check():
             "timestamp": sobriety_entry["timestamp"].isoformat() + "Z"
         })
 
+    except ModelDisabledError:
+        raise
+    except PoolBusyError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "2"}
+    except AnalysisTimeoutError as e:
+        return jsonify({"error": str(e)}), 504
     except Exception as e:
-        # Clean up on error
-        if os.path.exists(filepath):
-            os.remove(filepath)
-        return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
+
+@sobriety_bp.route('/api/sobriety-check/stats', methods=['GET'])
+def sobriety_check_stats():
+    return jsonify({
+        "pool": get_pool_stats(),
+        "admission": get_limit_stats()
+    }), 200
+
+@sobriety_bp.route('/api/sobriety-history/<user_id>', methods=['GET'])
+def sobriety_history(user_id):
+    """
+    GET /api/sobriety-history/<user_id>?recent=N
+    Running baseline summary (constant size), plus the N most recent
+    results when asked for.
+    """
+    recent = request.args.get('recent', default=0, type=int)
+    projection = {"_id": 0, "sobriety_baseline": 1, "last_sobriety_check": 1}
+    if recent > 0:
+        projection["sobriety_results"] = {"$slice": -recent}
+
+    user = users_collection.find_one({"user_id": user_id}, projection)
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    body = {
+        "user_id": user_id,
+        "last_sobriety_check": user.get("last_sobriety_check"),
+        "baseline": summarize(user.get("sobriety_baseline"))
+    }
+    if recent > 0:
+        body["recent"] = user.get("sobriety_results", [])
+    return jsonify(body), 200
@@ -1,10 +1,15 @@
 # routes/submit_task.py
 from flask import Blueprint, request, jsonify
-from datetime import datetime, timezone
 import uuid, os
 
+from config import Config
 from utils.db import users_collection   # ✅ import from db.py
-from utils.verify import matches_task  # ✅ put your AI verification logic in utils/verifier.py
+from utils.verify import matches_task, get_verdict_cache_stats  # ✅ put your AI verification logic in utils/verifier.py
+from utils.batching import QueueFullError
+from utils.image_ingest import InvalidImageError, decode_image, read_upload
+from utils.verify_jobs import (
+    apply_verification, enqueue_verification, expire_job, get_job, get_queue_stats, is_stale_verification
+)
 
 submit_bp = Blueprint("submit_bp", __name__)
 
@@ -17,10 +22,12 @@ def submit_task():
     if not all([user_id, task_id, photo]):
         return jsonify({"error": "user_id, task_id, and photo required"}), 400
 
-    # Save photo
-    filename = f"static/photos/{user_id}_{task_id}_{uuid.uuid4().hex}.jpg"
-    os.makedirs("static/photos", exist_ok=True)
-    photo.save(filename)
+    # Decode in memory, reduced to what CLIP needs
+    data = read_upload(photo)
+    try:
+        image = decode_image(data, min_side=Config.VERIFY_IMAGE_MIN_SIDE)
+    except InvalidImageError as e:
+        return jsonify({"error": str(e)}), 400
 
     # Find user and task
     user = users_collection.find_one({"user_id": user_id, "tasks.task_id": task_id})
@@ -32,62 +39,53 @@ def submit_task():
     # ✅ Allow retry only if rejected
     if task["status"] == "approved":
         return jsonify({"error": "Task already approved. Cannot resubmit."}), 400
-    if task["status"] not in ["pending", "rejected"]:
+    # A task stuck in "verifying" (its job was lost) may be resubmitted
+    if task["status"] not in ["pending", "rejected"] and not is_stale_verification(task):
         return jsonify({"error": "Task status not allowed for resubmission"}), 400
 
-    # ✅ AI Verify the photo
-    verification = matches_task(filename, task["title"])
+    # Optionally keep the original upload (bytes as received, no re-encode)
+    filename = None
+    if Config.PERSIST_TASK_PHOTOS:
+        filename = f"static/photos/{user_id}_{task_id}_{uuid.uuid4().hex}.jpg"
+        os.makedirs("static/photos", exist_ok=True)
+        with open(filename, "wb") as f:
+            f.write(data)
 
-    if not verification["verified"]:
-        users_collection.update_one(
-            {"user_id": user_id, "tasks.task_id": task_id},
-            {
-                "$set": {
-                    "tasks.$.status": "rejected",
-                    "tasks.$.photo_url": filename,
-                    "tasks.$.feedback": verification.get("reason", "Photo does not match task"),
-                    "tasks.$.verified_at": datetime.now(timezone.utc)
-                }
-            }
-        )
+    # ⏳ Async mode: queue the photo for batched verification
+    async_flag = request.form.get('async')
+    use_async = Config.VERIFY_ASYNC if async_flag is None else async_flag.lower() in ("1", "true", "yes")
+    if use_async:
+        try:
+            job_id = enqueue_verification(user_id, task_id, task, image, filename, user.get("streak", 0))
+        except QueueFullError:
+            return jsonify({"error": "Verification queue is full, please retry shortly"}), 503, {"Retry-After": "5"}
         return jsonify({
-            "status": "rejected",
-            "message": "Photo verification failed",
-            "reason": verification.get("reason", "Does not match task"),
-            "confidence": verification.get("confidence", 0)
-        }), 400
+            "status": "queued",
+            "job_id": job_id,
+            "status_url": f"/api/submit-task/jobs/{job_id}"
+        }), 202
+
+    # The lost job must not overwrite this result if it ever completes
+    if task.get("verification_job"):
+        expire_job(task["verification_job"])
+
+    # ✅ AI Verify the photo
+    verification = matches_task(image, task["title"], {"user_id": user_id, "task_id": task_id})
 
-    # ✅ Approved! Finalize task
-    badge_name = task["badge"]
-    badge_image = f"static/badges/{badge_name.lower().replace(' ', '_')}.png"
-    os.makedirs("static/badges", exist_ok=True)
+    body, status = apply_verification(user_id, task_id, task, filename, verification, user.get("streak", 0))
+    return jsonify(body), status
 
-    users_collection.update_one(
-        {"user_id": user_id, "tasks.task_id": task_id},
-        {
-            "$set": {
-                "tasks.$.status": "approved",
-                "tasks.$.photo_url": filename,
-                "tasks.$.completed_at": datetime.now(timezone.utc),
-                "tasks.$.ai_verified": True,
-                "tasks.$.confidence": verification["confidence"]
-            },
-            "$push": {
-                "badges": {
-                    "badge": badge_name,
-                    "image": badge_image,
-                    "earned_at": datetime.now(timezone.utc)
-                }
-            },
-            "$inc": {"streak": 1}
-        }
-    )
+# GET: Status of an async verification job
+@submit_bp.route('/api/submit-task/jobs/<job_id>', methods=['GET'])
+def verification_job_status(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
 
+@submit_bp.route('/api/submit-task/stats', methods=['GET'])
+def submit_task_stats():
     return jsonify({
-        "status": "approved",
-        "badge_awarded": badge_name,
-        "photo_url": filename,
-        "streak": user.get("streak", 0) + 1,
-        "message": "Great job! Your task was verified and approved 🎉",
-        "confidence": verification["confidence"]
-    })
+        "queue": get_queue_stats(),
+        "verdict_cache": get_verdict_cache_stats()
+    }), 200
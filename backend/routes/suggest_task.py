@@ -3,6 +3,8 @@ from datetime import datetime, timezone
 import uuid
 from utils.db import users_collection  # import your MongoDB collection
 from utils.tasks import suggest_task_from_issues  # assume you have this in utils
+from utils.model_registry import registry
+from utils.verify import cache_task_prompt
 
 # Define Blueprint
 suggest_bp = Blueprint("suggest_bp", __name__)
@@ -29,6 +31,13 @@ def suggest_task():
     task["status"] = "pending"
     task["assigned_at"] = datetime.now(timezone.utc)
 
+    # Pre-encode the task prompt so photo verification only runs the vision tower
+    if registry.is_enabled("clip"):
+        try:
+            cache_task_prompt(task["title"])
+        except Exception as e:
+            print(f"Could not cache task prompt: {e}")
+
     # Insert into user's tasks
     users_collection.update_one(
         {"user_id": user_id},
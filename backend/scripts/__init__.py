@@ -0,0 +1,2 @@
+# backend/scripts/__init__.py
+# Maintenance and benchmark scripts — run from backend/ as `python -m scripts.<name>`
@@ -0,0 +1,39 @@
+# backend/scripts/backfill_sobriety_baseline.py
+"""
+Build `sobriety_baseline` for users whose checks predate it, by replaying
+their stored `sobriety_results` in order.
+
+Usage (from backend/):
+    python -m scripts.backfill_sobriety_baseline [--force]
+
+Users that already have a baseline are skipped unless --force is given.
+"""
+import argparse
+
+from utils.db import users_collection
+from utils.sobriety_baseline import check_metrics, update_baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="rebuild existing baselines too")
+    args = parser.parse_args()
+
+    query = {"sobriety_results.0": {"$exists": True}}
+    if not args.force:
+        query["sobriety_baseline"] = {"$exists": False}
+
+    updated = 0
+    for user in users_collection.find(query, {"user_id": 1, "sobriety_results": 1}):
+        baseline = None
+        for entry in sorted(user["sobriety_results"], key=lambda e: e["timestamp"]):
+            metrics = check_metrics(entry.get("image_analysis", {}))
+            baseline = update_baseline(baseline, metrics, entry.get("is_sober", False), entry["timestamp"])
+        users_collection.update_one({"_id": user["_id"]}, {"$set": {"sobriety_baseline": baseline}})
+        updated += 1
+
+    print(f"Backfilled sobriety baselines for {updated} users")
+
+
+if __name__ == "__main__":
+    main()
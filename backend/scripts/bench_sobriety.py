@@ -0,0 +1,104 @@
+# backend/scripts/bench_sobriety.py
+"""
+Benchmark the fast sobriety path against the original full-resolution one.
+
+Usage (from backend/):
+    python -m scripts.bench_sobriety path/to/fixtures [--repeat 5]
+
+Every .jpg/.jpeg/.png in the fixture directory is analyzed with
+analyze_sobriety(fast=False) and analyze_sobriety(fast=True). The report
+gives median latency per path and, per image, whether the outputs agree
+(same error/flags, redness delta, face box IoU).
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+import cv2
+
+from utils.sobriety import analyze_sobriety
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def timed(image, fast, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = analyze_sobriety(image, fast=fast)
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def compare(reference, fast):
+    if "error" in reference or "error" in fast:
+        return {"match": reference.get("error") == fast.get("error"),
+                "reference_error": reference.get("error"), "fast_error": fast.get("error")}
+    ref_a, fast_a = reference["image_analysis"], fast["image_analysis"]
+    deltas = [
+        abs(ref_a[k] - fast_a[k])
+        for k in ("left_redness", "right_redness")
+        if k in ref_a and k in fast_a
+    ]
+    return {
+        "match": sorted(reference["flags"]) == sorted(fast["flags"]),
+        "max_redness_delta": round(max(deltas), 3) if deltas else None,
+        "face_iou": round(iou(ref_a["face_region"], fast_a["face_region"]), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", help="directory of face images")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = sorted(
+        os.path.join(args.fixtures, name)
+        for name in os.listdir(args.fixtures)
+        if name.lower().endswith((".jpg", ".jpeg", ".png"))
+    )
+    if not paths:
+        raise SystemExit("No images found")
+
+    # Warm up the cascade so model loading is not timed
+    analyze_sobriety(cv2.imread(paths[0]), fast=False)
+
+    per_image, ref_times, fast_times = [], [], []
+    for path in paths:
+        image = cv2.imread(path)
+        reference, ref_t = timed(image, False, args.repeat)
+        fast, fast_t = timed(image, True, args.repeat)
+        ref_times.append(ref_t)
+        fast_times.append(fast_t)
+        per_image.append({
+            "image": os.path.basename(path),
+            "size": list(image.shape[1::-1]),
+            "reference_ms": round(ref_t * 1000, 2),
+            "fast_ms": round(fast_t * 1000, 2),
+            **compare(reference, fast)
+        })
+
+    ref_median, fast_median = statistics.median(ref_times), statistics.median(fast_times)
+    print(json.dumps({
+        "images": len(paths),
+        "reference_median_ms": round(ref_median * 1000, 2),
+        "fast_median_ms": round(fast_median * 1000, 2),
+        "speedup": round(ref_median / fast_median, 2) if fast_median else None,
+        "parity": round(sum(r["match"] for r in per_image) / len(per_image), 3),
+        "per_image": per_image
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# backend/scripts/calibrate_clip.py
+"""
+Measure how reduced-precision CLIP modes shift photo verification against fp32.
+
+Usage (from backend/):
+    python -m scripts.calibrate_clip samples.csv [--modes int8 bf16]
+
+samples.csv columns: path,task,expected
+  path      image file
+  task      task title as assigned (e.g. "Take a photo of your shoes by the door")
+  expected  1 if the photo should be approved, 0 if it should be rejected
+
+Images go through the same decode path as /api/submit-task
+(utils.image_ingest.decode_image, reduced to VERIFY_IMAGE_MIN_SIDE), so the
+numbers reflect what is served. For each mode the report lists accuracy
+against `expected`, verdict agreement with fp32, the confidence shift
+versus fp32 and per-image latency (CLIP only, decoding excluded).
+"""
+import argparse
+import csv
+import json
+import time
+
+import numpy as np
+import torch
+
+from config import Config
+from utils.image_ingest import decode_image
+from utils.verify import BASE_CANDIDATES, encode_images, encode_texts, load_clip, task_prompt, verdict_from_embedding
+
+
+def load_sample_image(path):
+    with open(path, "rb") as f:
+        return decode_image(f.read(), min_side=Config.VERIFY_IMAGE_MIN_SIDE)
+
+
+def run_mode(precision, samples):
+    clip = load_clip(precision)
+    base_embeds = encode_texts(BASE_CANDIDATES, clip=clip)
+
+    verdicts, latencies = [], []
+    for sample in samples:
+        image = load_sample_image(sample["path"])
+        start = time.perf_counter()
+        image_embed = encode_images([image], clip=clip)[0]
+        text_embeds = torch.cat([encode_texts([task_prompt(sample["task"])], clip=clip), base_embeds])
+        verdicts.append(verdict_from_embedding(image_embed, sample["task"], text_embeds=text_embeds, clip=clip))
+        latencies.append(time.perf_counter() - start)
+
+    return clip[0].verify_precision, verdicts, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("samples", help="CSV file with path,task,expected columns")
+    parser.add_argument("--modes", nargs="+", default=["int8", "bf16"], choices=["int8", "bf16"])
+    args = parser.parse_args()
+
+    with open(args.samples, newline="") as f:
+        samples = [
+            {"path": row["path"], "task": row["task"], "expected": row["expected"].strip() in ("1", "true", "yes")}
+            for row in csv.DictReader(f)
+        ]
+    if not samples:
+        raise SystemExit("No samples found")
+
+    expected = np.array([s["expected"] for s in samples])
+    _, baseline, baseline_latency = run_mode("fp32", samples)
+    base_verified = np.array([v["verified"] for v in baseline])
+    base_conf = np.array([v["confidence"] for v in baseline])
+
+    report = {
+        "samples": len(samples),
+        "fp32": {
+            "accuracy": round(float((base_verified == expected).mean()), 4),
+            "mean_confidence": round(float(base_conf.mean()), 4),
+            "median_latency_ms": round(float(np.median(baseline_latency)) * 1000, 1)
+        }
+    }
+
+    for mode in args.modes:
+        effective, verdicts, latency = run_mode(mode, samples)
+        verified = np.array([v["verified"] for v in verdicts])
+        conf = np.array([v["confidence"] for v in verdicts])
+        shift = conf - base_conf
+        report[mode] = {
+            "effective_precision": effective,
+            "accuracy": round(float((verified == expected).mean()), 4),
+            "agreement_with_fp32": round(float((verified == base_verified).mean()), 4),
+            "flipped_verdicts": [samples[i]["path"] for i in np.flatnonzero(verified != base_verified)],
+            "mean_confidence": round(float(conf.mean()), 4),
+            "mean_confidence_shift": round(float(shift.mean()), 4),
+            "max_abs_confidence_shift": round(float(np.abs(shift).max()), 4),
+            "median_latency_ms": round(float(np.median(latency)) * 1000, 1)
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
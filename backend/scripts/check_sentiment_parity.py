@@ -0,0 +1,61 @@
+# backend/scripts/check_sentiment_parity.py
+"""
+Check that the ONNX sentiment backend agrees with the PyTorch pipeline.
+
+Usage (from backend/):
+    python -m scripts.check_sentiment_parity [--int8] [--tolerance 0.02] [texts.txt]
+
+texts.txt holds one sample per line; a small built-in set is used if omitted.
+Exits non-zero when any label differs or a score is outside tolerance.
+"""
+import argparse
+import json
+import sys
+import time
+
+from config import Config
+from utils.onnx_classifier import OnnxTextClassifier, check_parity
+from utils.sentiment import MODEL_NAME, load_classifier
+
+DEFAULT_SAMPLES = [
+    "I feel great today, finally slept well.",
+    "I'm so tired of everything and nothing seems to help.",
+    "Why does this keep happening to me, I'm furious.",
+    "I'm scared I'll relapse this weekend.",
+    "Wow, I didn't expect to make it this far!",
+    "I love my family and they support me.",
+    "Went to work, came home, made dinner.",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("samples", nargs="?", help="file with one text per line")
+    parser.add_argument("--int8", action="store_true", help="check the int8 quantized model")
+    parser.add_argument("--tolerance", type=float, default=0.02)
+    args = parser.parse_args()
+
+    texts = DEFAULT_SAMPLES
+    if args.samples:
+        with open(args.samples) as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    torch_classifier = load_classifier("torch")
+    onnx_classifier = OnnxTextClassifier(
+        MODEL_NAME,
+        quantize=args.int8,
+        cache_dir=Config.MODEL_CACHE_DIR,
+        num_threads=Config.SENTIMENT_NUM_THREADS
+    )
+
+    start = time.perf_counter()
+    report = check_parity(onnx_classifier, torch_classifier, texts, tolerance=args.tolerance)
+    report["backend"] = "onnx-int8" if args.int8 else "onnx"
+    report["elapsed_seconds"] = round(time.perf_counter() - start, 2)
+
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
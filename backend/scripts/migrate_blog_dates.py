@@ -0,0 +1,48 @@
+# backend/scripts/migrate_blog_dates.py
+"""
+One-off migration: give every blog a real `published_at` datetime.
+
+Usage (from backend/):
+    python -m scripts.migrate_blog_dates [--dry-run]
+
+Older blogs only have `date` as a "%b %d, %Y" string, which sorts
+lexicographically. The string is parsed when possible; otherwise the
+creation time embedded in the ObjectId is used. Also creates the
+(published_at, _id) index used by /admin/blogs pagination.
+"""
+import argparse
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from models.blog import SORT
+from utils.db import blogs_collection
+
+
+def parse_date(blog):
+    try:
+        return datetime.strptime(blog.get("date", ""), "%b %d, %Y")
+    except ValueError:
+        return blog["_id"].generation_time.replace(tzinfo=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    ops = []
+    for blog in blogs_collection.find({"published_at": {"$exists": False}}, {"date": 1}):
+        ops.append(UpdateOne({"_id": blog["_id"]}, {"$set": {"published_at": parse_date(blog)}}))
+
+    if args.dry_run:
+        print(f"{len(ops)} blogs would be migrated")
+        return
+    if ops:
+        blogs_collection.bulk_write(ops, ordered=False)
+    blogs_collection.create_index(SORT)
+    print(f"Migrated {len(ops)} blogs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# utils/analysis_cache.py
+from config import Config
+from utils.cache import TTLCache, text_key
+
+shared_collection = None
+if Config.ANALYSIS_CACHE_SHARED:
+    from utils.db import analysis_cache_collection
+    shared_collection = analysis_cache_collection
+    try:
+        # Let MongoDB drop expired entries on its own
+        shared_collection.create_index("expires_at", expireAfterSeconds=0)
+    except Exception as e:
+        print(f"Could not create analysis cache TTL index: {e}")
+
+# One cache for all text analyses; keys are namespaced per analysis
+analysis_cache = TTLCache(
+    maxsize=Config.ANALYSIS_CACHE_SIZE,
+    ttl=Config.ANALYSIS_CACHE_TTL,
+    shared_collection=shared_collection
+)
+
+
+def cached(namespace, normalize, compute, text, cacheable=lambda result: True):
+    """
+    Return compute(text), reusing a previous result for the same normalized
+    text when there is one. Results for which cacheable() is False are
+    returned but never stored.
+    """
+    if not Config.ANALYSIS_CACHE_ENABLED:
+        return compute(text)
+
+    key = text_key(namespace, normalize(text))
+    result = analysis_cache.get(key)
+    if result is not None:
+        return result
+
+    result = compute(text)
+    if cacheable(result):
+        analysis_cache.set(key, result)
+    return result
+
+
+def get_cache_stats():
+    return {"enabled": Config.ANALYSIS_CACHE_ENABLED, **analysis_cache.stats()}
@@ -0,0 +1,122 @@
+# utils/batching.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class QueueFullError(Exception):
+    """Raised when the batcher already holds max_queue pending items."""
+
+
+class MicroBatcher:
+    """
+    Collects items from concurrent callers and runs them through batch_fn
+    in one call. A batch is flushed when max_batch_size items are waiting
+    or when the oldest waiting item has been queued for window_ms.
+
+    batch_fn receives a list of items and must return a list of results
+    in the same order.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, window_ms=10, max_queue=1024, workers=1, name="batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window = max(0.0, window_ms / 1000.0)
+        self.max_queue = max_queue
+        self.workers = max(1, int(workers))
+        self.name = name
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+
+        # Stats
+        self._batches = 0
+        self._items = 0
+        self._max_seen_batch = 0
+        self._last_batch_size = 0
+
+    def _ensure_worker(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._run, name=f"{self.name}-{len(self._threads)}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, item):
+        """
+        Queue an item and return a Future that resolves to its result.
+        """
+        future = Future()
+        with self._cond:
+            if self.max_queue and len(self._queue) >= self.max_queue:
+                raise QueueFullError(f"{self.name} queue is full ({self.max_queue} pending)")
+            self._queue.append((item, future, time.monotonic()))
+            self._ensure_worker()
+            self._cond.notify()
+        return future
+
+    def __call__(self, item, timeout=None):
+        """
+        Queue an item and block until its result is ready.
+        """
+        return self.submit(item).result(timeout=timeout)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            # Wait until the batch is full or the oldest item's window expires
+            deadline = self._queue[0][2] + self.window
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            items = [item for item, _, _ in batch]
+            futures = [future for _, future, _ in batch]
+
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name}: batch_fn returned {len(results)} results for {len(items)} items"
+                    )
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+
+            with self._cond:
+                self._batches += 1
+                self._items += len(items)
+                self._last_batch_size = len(items)
+                self._max_seen_batch = max(self._max_seen_batch, len(items))
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queue_depth": len(self._queue),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "last_batch_size": self._last_batch_size,
+                "max_batch_size_seen": self._max_seen_batch,
+                "max_batch_size": self.max_batch_size,
+                "window_ms": round(self.window * 1000, 2),
+                "max_queue": self.max_queue,
+                "workers": self.workers,
+            }
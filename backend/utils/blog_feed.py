@@ -0,0 +1,217 @@
+# utils/blog_feed.py
+import threading
+import time
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from config import Config
+from utils.db import blog_feed_cache_collection
+from utils.blog_helper import generate_blog_from_source
+
+FEED_ID = "user_feed"
+
+_refresh_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    "fresh_hits": 0,
+    "stale_hits": 0,
+    "misses": 0,
+    "refreshes": 0,
+    "refresh_failures": 0,
+    "last_refresh_seconds": None,
+    "last_error": None,
+    "cold_waits": 0
+}
+_scheduler = None
+
+
+def _count(name, value=1):
+    with _stats_lock:
+        _stats[name] += value
+
+
+def _acquire_lease():
+    """
+    Claim the refresh for BLOG_FEED_LEASE_SECONDS so only one process
+    (and thread) regenerates the feed at a time. False if another holds it,
+    or if a recent failure is still backing off (retry_after).
+    """
+    now = datetime.utcnow()
+    try:
+        blog_feed_cache_collection.update_one(
+            {"_id": FEED_ID, "$and": [
+                {"$or": [{"refreshing_until": {"$exists": False}}, {"refreshing_until": {"$lt": now}}]},
+                {"$or": [{"retry_after": {"$exists": False}}, {"retry_after": {"$lt": now}}]}
+            ]},
+            {"$set": {"refreshing_until": now + timedelta(seconds=Config.BLOG_FEED_LEASE_SECONDS)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # The feed document exists and its lease is still held
+        return False
+
+
+def refresh_feed(wait=False):
+    """
+    Regenerate the feed (RSS fetch + Gemini rewrites) and store it.
+    An empty or failed refresh keeps the previous feed.
+    With wait=True (cold start) a refresh already running in this process
+    is waited for instead of skipped, and its result reused.
+    Returns True if a new feed was stored.
+    """
+    if not _refresh_lock.acquire(blocking=wait):
+        return False
+    try:
+        if wait and blog_feed_cache_collection.find_one({"_id": FEED_ID, "blogs": {"$exists": True}}, {"_id": 1}):
+            return True
+        if not _acquire_lease():
+            return False
+        start = time.perf_counter()
+        try:
+            blogs = generate_blog_from_source()
+        except Exception as e:
+            blogs = []
+            error = str(e)
+        else:
+            error = None if blogs else "Feed source returned no posts"
+        duration = round(time.perf_counter() - start, 3)
+
+        if blogs:
+            update = {
+                "$set": {"blogs": blogs, "refreshed_at": datetime.utcnow(), "refresh_seconds": duration},
+                "$unset": {"refreshing_until": "", "retry_after": "", "failures": "", "last_failure": ""}
+            }
+        else:
+            # Back off exponentially so stale reads don't retry a failing source on every request
+            doc = blog_feed_cache_collection.find_one({"_id": FEED_ID}, {"failures": 1}) or {}
+            failures = doc.get("failures", 0) + 1
+            delay = min(Config.BLOG_FEED_RETRY_SECONDS * 2 ** (failures - 1), Config.BLOG_FEED_RETRY_MAX_SECONDS)
+            now = datetime.utcnow()
+            update = {
+                "$set": {
+                    "failures": failures,
+                    "last_failure": {"at": now, "error": error},
+                    "retry_after": now + timedelta(seconds=delay)
+                },
+                "$unset": {"refreshing_until": ""}
+            }
+        blog_feed_cache_collection.update_one({"_id": FEED_ID}, update)
+
+        with _stats_lock:
+            _stats["refreshes"] += 1
+            _stats["last_refresh_seconds"] = duration
+            if error:
+                _stats["refresh_failures"] += 1
+                _stats["last_error"] = error
+        if error:
+            print(f"Blog feed refresh failed: {error}")
+        return bool(blogs)
+    finally:
+        _refresh_lock.release()
+
+
+def _refresh_in_background():
+    if _refresh_lock.locked():
+        return  # Already refreshing in this process
+    threading.Thread(target=refresh_feed, name="blog-feed-refresh", daemon=True).start()
+
+
+def _wait_for_leaseholder():
+    """
+    Cold start while another process holds the lease: poll for its result
+    for up to BLOG_FEED_COLD_WAIT_SECONDS. Returns the feed doc or None.
+    """
+    deadline = time.monotonic() + Config.BLOG_FEED_COLD_WAIT_SECONDS
+    _count("cold_waits")
+    while True:
+        doc = blog_feed_cache_collection.find_one(
+            {"_id": FEED_ID}, {"blogs": 1, "refreshed_at": 1, "refreshing_until": 1}
+        )
+        if doc and "blogs" in doc:
+            return doc
+        still_refreshing = doc and doc.get("refreshing_until") and doc["refreshing_until"] > datetime.utcnow()
+        if not still_refreshing or time.monotonic() >= deadline:
+            return None
+        time.sleep(0.5)
+
+
+def get_feed():
+    """
+    Stale-while-revalidate read of the cached feed: one lookup by _id.
+    - fresh (younger than BLOG_FEED_TTL): served as is
+    - stale: served as is while a background refresh runs (unless a
+      failed refresh is still backing off)
+    - missing: generated once in the request (cold start), or waited for
+      briefly when another process is already generating it
+    Returns (blogs, cache_state, age_seconds).
+    """
+    doc = blog_feed_cache_collection.find_one({"_id": FEED_ID}, {"blogs": 1, "refreshed_at": 1, "retry_after": 1})
+    if not doc or "blogs" not in doc:
+        _count("misses")
+        if not refresh_feed(wait=True):
+            doc = _wait_for_leaseholder()
+            if not doc:
+                return [], "miss", None
+        else:
+            doc = blog_feed_cache_collection.find_one({"_id": FEED_ID}, {"blogs": 1, "refreshed_at": 1})
+            if not doc or "blogs" not in doc:
+                return [], "miss", None
+        return doc["blogs"], "miss", (datetime.utcnow() - doc["refreshed_at"]).total_seconds()
+
+    age = (datetime.utcnow() - doc["refreshed_at"]).total_seconds()
+    if age < Config.BLOG_FEED_TTL:
+        _count("fresh_hits")
+        return doc["blogs"], "fresh", age
+
+    _count("stale_hits")
+    if not doc.get("retry_after") or doc["retry_after"] <= datetime.utcnow():
+        _refresh_in_background()
+    return doc["blogs"], "stale", age
+
+
+def _run_scheduler():
+    while True:
+        try:
+            doc = blog_feed_cache_collection.find_one({"_id": FEED_ID}, {"refreshed_at": 1})
+            age = (datetime.utcnow() - doc["refreshed_at"]).total_seconds() if doc and "refreshed_at" in doc else None
+            if age is None or age >= Config.BLOG_FEED_TTL:
+                refresh_feed()
+        except Exception as e:
+            print(f"Blog feed scheduler error: {e}")
+        time.sleep(Config.BLOG_FEED_REFRESH_SECONDS)
+
+
+def start_scheduler():
+    """Refresh the feed whenever it goes stale, checked every BLOG_FEED_REFRESH_SECONDS."""
+    global _scheduler
+    if _scheduler is None or not _scheduler.is_alive():
+        _scheduler = threading.Thread(target=_run_scheduler, name="blog-feed-scheduler", daemon=True)
+        _scheduler.start()
+    return _scheduler
+
+
+def get_feed_stats():
+    doc = blog_feed_cache_collection.find_one(
+        {"_id": FEED_ID},
+        {"refreshed_at": 1, "refresh_seconds": 1, "refreshing_until": 1, "failures": 1, "last_failure": 1, "retry_after": 1}
+    )
+    refreshed_at = doc.get("refreshed_at") if doc else None
+    last_failure = doc.get("last_failure") if doc else None
+    retry_after = doc.get("retry_after") if doc else None
+    with _stats_lock:
+        stats = dict(_stats)
+    return {
+        "ttl_seconds": Config.BLOG_FEED_TTL,
+        "age_seconds": round((datetime.utcnow() - refreshed_at).total_seconds(), 1) if refreshed_at else None,
+        "refreshed_at": refreshed_at.isoformat() + "Z" if refreshed_at else None,
+        "stored_refresh_seconds": doc.get("refresh_seconds") if doc else None,
+        "refreshing": bool(doc and doc.get("refreshing_until") and doc["refreshing_until"] > datetime.utcnow()),
+        "scheduler_running": _scheduler is not None and _scheduler.is_alive(),
+        "consecutive_failures": doc.get("failures", 0) if doc else 0,
+        "last_failure": {
+            "at": last_failure["at"].isoformat() + "Z",
+            "error": last_failure.get("error")
+        } if last_failure else None,
+        "retry_after": retry_after.isoformat() + "Z" if retry_after and retry_after > datetime.utcnow() else None,
+        **stats
+    }
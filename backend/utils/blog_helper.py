@@ -1,37 +1,100 @@
 # utils/blog_helper.py
 import feedparser
-import requests
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from google.generativeai import GenerativeModel
 from datetime import datetime
-import os
+from urllib.parse import urlparse
 from config import Config
+from utils.db import feed_state_collection, rewritten_posts_collection
 
 # Configure Gemini
 import google.generativeai as genai
 genai.configure(api_key=Config.GOOGLE_API_KEY)
 model = GenerativeModel("gemini-2.0-flash")
 
-def fetch_reddit_recovery_posts(limit=10):
+try:
+    rewritten_posts_collection.create_index([("published_at", -1)])
+except Exception as e:
+    print(f"Could not create rewritten posts index: {e}")
+
+
+def link_key(link):
+    """Memoization key for a post: sha256 of its source link."""
+    return hashlib.sha256(link.strip().encode("utf-8")).hexdigest()
+
+
+def feed_source_name(url):
+    """"Reddit/r/stopdrinking" for subreddit feeds, the host name otherwise."""
+    parsed = urlparse(url)
+    parts = [p for p in parsed.path.split("/") if p]
+    if "reddit.com" in parsed.netloc and len(parts) >= 2 and parts[0] == "r":
+        return f"Reddit/r/{parts[1]}"
+    return parsed.netloc
+
+
+# ——————————————————————
+# Fetching
+# ——————————————————————
+def fetch_feed_entries(url, limit=10):
     """
-    Fetch recent posts from r/stopdrinking
+    Fetch recent posts from one RSS/Atom feed. The request is conditional
+    (ETag / Last-Modified from the previous fetch), so an unchanged feed
+    costs a 304 and returns no entries.
     """
-    feed = feedparser.parse("https://www.reddit.com/r/stopdrinking/.rss")
+    state = feed_state_collection.find_one({"_id": url}) or {}
+    feed = feedparser.parse(url, etag=state.get("etag"), modified=state.get("modified"))
+    status = getattr(feed, "status", None)
+
+    feed_state_collection.update_one(
+        {"_id": url},
+        {"$set": {
+            "etag": getattr(feed, "etag", None) or state.get("etag"),
+            "modified": getattr(feed, "modified", None) or state.get("modified"),
+            "last_status": status,
+            "last_checked": datetime.utcnow()
+        }},
+        upsert=True
+    )
+    if status == 304:
+        return []
+
+    source = feed_source_name(url)
     entries = []
     for entry in feed.entries[:limit]:
+        if not entry.get("link"):
+            continue
         # Extract plain text from description (remove HTML)
-        summary = entry.summary.replace("<p>", "").replace("</p>", "").strip()
+        summary = entry.get("summary", "").replace("<p>", "").replace("</p>", "").strip()
+        published = entry.get("published_parsed") or entry.get("updated_parsed")
+        published_at = datetime(*published[:6]) if published else datetime.utcnow()
         entries.append({
             "title": entry.title,
             "raw_content": summary,
-            "source": "Reddit/r/stopdrinking",
+            "source": source,
             "link": entry.link,
-            "date": datetime.now().strftime("%b %d, %Y")
+            "published_at": published_at,
+            "date": published_at.strftime("%b %d, %Y")
         })
     return entries
 
+
+def fetch_reddit_recovery_posts(limit=10):
+    """
+    Fetch recent posts from r/stopdrinking
+    """
+    return fetch_feed_entries("https://www.reddit.com/r/stopdrinking/.rss", limit=limit)
+
+
+# ——————————————————————
+# Rewriting
+# ——————————————————————
 def rewrite_with_gemini(title, content):
     """
-    Use Gemini to rewrite content in a warm, recovery-focused tone
+    Use Gemini to rewrite content in a warm, recovery-focused tone.
+    Returns (text, rewritten): on failure the original content comes back
+    with rewritten=False.
     """
     prompt = f"""
     Rewrite the following personal recovery story in a warm, heartfelt, and encouraging tone.
@@ -45,20 +108,123 @@ def rewrite_with_gemini(title, content):
     Rewritten Story:
     """
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        response = model.generate_content(prompt, request_options={"timeout": Config.BLOG_REWRITE_TIMEOUT})
+        return response.text.strip(), True
     except Exception as e:
         print(f"Gemini error: {e}")
-        return content  # fallback to original
+        return content, False  # fallback to original
+
 
-def generate_blog_from_source():
+def rewrite_posts(posts):
     """
-    Fetch real posts → rewrite with Gemini → return clean blog
+    Rewrite posts concurrently (at most BLOG_REWRITE_CONCURRENCY Gemini
+    calls at once), so a batch takes about as long as its slowest rewrite.
+    Posts still running after BLOG_REWRITE_TIMEOUT keep their original text.
+    Returns a list of (text, rewritten) in the same order.
     """
-    posts = fetch_reddit_recovery_posts(limit=5)
+    if not posts:
+        return []
+    workers = min(Config.BLOG_REWRITE_CONCURRENCY, len(posts))
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(rewrite_with_gemini, p["title"], p["raw_content"]) for p in posts]
+        # Budget covers queued rewrites too when there are more posts than workers
+        rounds = -(-len(posts) // workers)
+        wait(futures, timeout=Config.BLOG_REWRITE_TIMEOUT * rounds + 1)
+        return [
+            f.result() if f.done() and not f.exception() else (p["raw_content"], False)
+            for f, p in zip(futures, posts)
+        ]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _store_post(post, text, rewritten):
+    rewritten_posts_collection.update_one(
+        {"_id": link_key(post["link"])},
+        {
+            "$set": {
+                "title": post["title"],
+                "raw_content": post["raw_content"],
+                "content": text,
+                "rewritten": rewritten,
+                "source": post["source"],
+                "link": post["link"],
+                "published_at": post["published_at"],
+                "date": post["date"],
+                "updated_at": datetime.utcnow()
+            },
+            "$inc": {"attempts": 1}
+        },
+        upsert=True
+    )
+
+
+# ——————————————————————
+# Ingestion
+# ——————————————————————
+def ingest_feeds(feeds=None):
+    """
+    Pull every configured feed and rewrite only what is new:
+    - conditional fetches skip unchanged feeds
+    - entries whose link was already rewritten are skipped (memoized by link hash)
+    - new entries, plus earlier ones whose rewrite failed (up to
+      BLOG_REWRITE_MAX_ATTEMPTS tries), are rewritten concurrently
+    Returns {"fetched", "new", "retried", "rewritten", "seconds"}.
+    """
+    start = time.perf_counter()
+    feeds = feeds or Config.BLOG_FEEDS
+
+    def _fetch(url):
+        try:
+            return fetch_feed_entries(url, limit=Config.BLOG_FEED_ENTRIES)
+        except Exception as e:
+            print(f"Feed fetch failed for {url}: {e}")
+            return []
+
+    # Feeds are fetched in parallel too
+    with ThreadPoolExecutor(max_workers=max(1, len(feeds))) as pool:
+        entries = [entry for batch in pool.map(_fetch, feeds) for entry in batch]
+
+    # Dedup within this batch, then against posts already stored
+    by_key = {link_key(e["link"]): e for e in entries}
+    known = {
+        doc["_id"]: doc
+        for doc in rewritten_posts_collection.find({"_id": {"$in": list(by_key)}}, {"rewritten": 1})
+    }
+    new_posts = [e for k, e in by_key.items() if k not in known]
+
+    # Retry stored posts whose rewrite failed, a bounded number of times,
+    # so a steady state with no new posts makes no Gemini calls
+    retry_posts = list(rewritten_posts_collection.find(
+        {"rewritten": False, "attempts": {"$lt": Config.BLOG_REWRITE_MAX_ATTEMPTS}},
+        {"title": 1, "raw_content": 1, "source": 1, "link": 1, "published_at": 1, "date": 1}
+    ).sort("published_at", -1).limit(Config.BLOG_REWRITE_CONCURRENCY))
+
+    todo = new_posts + retry_posts
+    results = rewrite_posts(todo)
+    for post, (text, rewritten) in zip(todo, results):
+        _store_post(post, text, rewritten)
+
+    return {
+        "fetched": len(entries),
+        "new": len(new_posts),
+        "retried": len(retry_posts),
+        "rewritten": sum(1 for _, ok in results if ok),
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def generate_blog_from_source(limit=5):
+    """
+    Ingest new posts → return the latest rewritten posts as clean blogs
+    """
+    stats = ingest_feeds()
+    print(f"Blog ingestion: {stats}")
+
     blogs = []
-    for post in posts:
-        rewritten = rewrite_with_gemini(post["title"], post["raw_content"])
+    for post in rewritten_posts_collection.find().sort("published_at", -1).limit(limit):
+        rewritten = post["content"]
         blogs.append({
             "title": post["title"],
             "excerpt": rewritten[:300] + "..." if len(rewritten) > 300 else rewritten,
@@ -69,4 +235,4 @@ def generate_blog_from_source():
             "readTime": f"{len(rewritten.split()) // 200 + 1} min read",
             "date": post["date"]
         })
-    return blogs
\ No newline at end of file
+    return blogs
@@ -0,0 +1,113 @@
+# utils/cache.py
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+
+def text_key(namespace, text):
+    """
+    Content-addressed key: sha256 of the normalized text, prefixed by a
+    namespace so different analyses never share entries.
+    """
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries also expire after ttl seconds.
+    Optionally backed by a shared MongoDB collection so every worker process
+    can reuse results computed by the others.
+    """
+
+    def __init__(self, maxsize=4096, ttl=3600, shared_collection=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared_collection
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._data[key]
+                self.expirations += 1
+
+        if self.shared is not None:
+            try:
+                doc = self.shared.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+            except Exception as e:
+                print(f"Shared cache read error: {e}")
+                doc = None
+            if doc:
+                self._store(key, doc["value"])
+                with self._lock:
+                    self.shared_hits += 1
+                return copy.deepcopy(doc["value"])
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        self._store(key, copy.deepcopy(value))
+        if self.shared is not None:
+            try:
+                self.shared.update_one(
+                    {"_id": key},
+                    {"$set": {
+                        "value": value,
+                        "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl)
+                    }},
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"Shared cache write error: {e}")
+
+    def _store(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, prefix=None):
+        with self._lock:
+            if prefix is None:
+                self._data.clear()
+            else:
+                for key in [k for k in self._data if k.startswith(prefix)]:
+                    del self._data[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "shared": self.shared is not None,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round((self.hits + self.shared_hits) / lookups, 3) if lookups else 0.0,
+            }
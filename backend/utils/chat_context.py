@@ -0,0 +1,127 @@
+# utils/chat_context.py
+import random
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from utils.db import users_collection
+from utils.gemini_chatbot import count_tokens, summarize_turns
+
+RAW_HISTORY_TURNS = 10  # Exchanges sent when compaction is off
+
+# Summary updates and token logging run here, off the request path
+_background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-compaction")
+
+
+def _to_gemini(turns):
+    history = []
+    for entry in turns:
+        history.append({"role": "user", "parts": [entry["user"]]})
+        history.append({"role": "model", "parts": [entry["bot"]]})
+    return history
+
+
+def build_history(user_id):
+    """
+    Gemini history for the next message.
+
+    Without compaction: the last RAW_HISTORY_TURNS exchanges.
+    With CHAT_COMPACTION: the running summary of older turns, followed by
+    the turns it does not cover yet (CHAT_RECENT_TURNS up to
+    CHAT_RECENT_TURNS + CHAT_SUMMARY_EVERY - 1 of them).
+
+    Returns (gemini_history, context) where context is what
+    after_reply() needs.
+    """
+    if not Config.CHAT_COMPACTION:
+        user_doc = users_collection.find_one(
+            {"user_id": user_id},
+            {"_id": 0, "user_id": 1, "chat_history": {"$slice": -RAW_HISTORY_TURNS}}
+        )
+        turns = (user_doc or {}).get("chat_history", [])
+        return _to_gemini(turns), None
+
+    user_doc = users_collection.find_one(
+        {"user_id": user_id},
+        {"_id": 0, "chat_history": {"$slice": -RAW_HISTORY_TURNS}, "chat_summary": 1, "chat_turns": 1}
+    ) or {}
+    summary = user_doc.get("chat_summary") or {}
+    total = user_doc.get("chat_turns", 0)
+    unsummarized = total - summary.get("through_turn", 0)
+    window = user_doc.get("chat_history", [])
+
+    if summary.get("text"):
+        recent = window[-unsummarized:] if unsummarized > 0 else []
+        history = [
+            {"role": "user", "parts": [f"Summary of our conversation so far: {summary['text']}"]},
+            {"role": "model", "parts": ["Thanks, I'll keep that in mind."]}
+        ] + _to_gemini(recent)
+    else:
+        # No summary yet (or turns that predate compaction): recent raw turns only
+        history = _to_gemini(window[-max(unsummarized, Config.CHAT_RECENT_TURNS):])
+
+    context = {"full_history": _to_gemini(window), "summary": summary, "total": total}
+    return history, context
+
+
+def after_reply(user_id, message, history, context):
+    """
+    Once a reply is saved: log prompt tokens with and without compaction
+    for a CHAT_LOG_TOKENS_SAMPLE share of replies (two count_tokens calls
+    each, so the savings stay measured without paying on every message),
+    and fold older turns into the summary when CHAT_SUMMARY_EVERY of them
+    have piled up. Runs on a small shared thread pool, off the request
+    path, and only when there is something to do.
+    """
+    if context is None:
+        return
+    # The reply just saved is one more turn than build_history() saw
+    through = context["summary"].get("through_turn", 0)
+    fold_due = context["total"] + 1 - through >= Config.CHAT_RECENT_TURNS + Config.CHAT_SUMMARY_EVERY
+    log_due = random.random() < Config.CHAT_LOG_TOKENS_SAMPLE
+    if fold_due or log_due:
+        _background.submit(_after_reply, user_id, message, history, context, fold_due, log_due)
+
+
+def _after_reply(user_id, message, history, context, fold_due, log_due):
+    if log_due:
+        try:
+            before = count_tokens(context["full_history"], message)
+            after = count_tokens(history, message)
+            saved = round(100 * (before - after) / before, 1) if before else 0.0
+            print(f"Chat prompt tokens for {user_id}: {before} raw → {after} compacted ({saved}% saved)")
+        except Exception as e:
+            print(f"Chat token count failed: {e}")
+    if fold_due:
+        try:
+            _fold_summary(user_id, context)
+        except Exception as e:
+            print(f"Chat summary update failed: {e}")
+
+
+def _fold_summary(user_id, context):
+    summary = context["summary"]
+    through = summary.get("through_turn", 0)
+    fold = context["total"] + 1 - through - Config.CHAT_RECENT_TURNS
+
+    # Pick turns through+1 .. through+fold by turn number. chat_turns and
+    # chat_history are updated together, so the last stored entry is turn
+    # chat_turns, even if newer messages arrived since this reply.
+    user_doc = users_collection.find_one(
+        {"user_id": user_id},
+        {"_id": 0, "chat_history": 1, "chat_turns": 1}
+    ) or {}
+    window = user_doc.get("chat_history", [])
+    first = user_doc.get("chat_turns", 0) - len(window) + 1  # turn number of window[0]
+    turns = window[max(0, through + 1 - first):max(0, through + fold + 1 - first)]
+    if not turns:
+        return
+    try:
+        text = summarize_turns(summary.get("text"), turns)
+    except Exception as e:
+        print(f"Chat summary update failed, keeping previous summary: {e}")
+        return
+
+    # Only applies if no other request updated the summary in the meantime
+    users_collection.update_one(
+        {"user_id": user_id, "chat_summary.through_turn": summary.get("through_turn")},
+        {"$set": {"chat_summary": {"text": text, "through_turn": through + fold}}}
+    )
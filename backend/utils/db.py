@@ -7,4 +7,10 @@ db = client['drug_quit_app']
 
 # Collections
 users_collection = db['users']
-blogs_collection = db['blogs']
\ No newline at end of file
+blogs_collection = db['blogs']
+analysis_cache_collection = db['analysis_cache']
+verification_jobs_collection = db['verification_jobs']
+keyword_lexicon_collection = db['keyword_lexicon']
+blog_feed_cache_collection = db['blog_feed_cache']
+feed_state_collection = db['feed_state']
+rewritten_posts_collection = db['rewritten_posts']
@@ -0,0 +1,266 @@
+# utils/embedding_store.py
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+from utils.file_lock import file_lock
+
+def _key_digest(content_key):
+    return hashlib.sha1(content_key.encode("utf-8")).digest()
+
+
+KEY_BYTES = 20
+NO_KEY = b"\0" * KEY_BYTES
+
+
+class EmbeddingStore:
+    """
+    Append-only store of L2-normalized embeddings on disk.
+
+    - <dir>/embeddings.f16: raw float16 matrix, one row per embedding
+    - <dir>/embeddings.ids.jsonl: one JSON metadata line per row (same order)
+    - <dir>/embeddings.offsets: uint64 byte offset of each row's metadata line
+    - <dir>/embeddings.keys: 20-byte digest of each row's content key
+    - <dir>/embeddings.keyindex: the same digests sorted (with their rows),
+      covering the first rows of the store; newer rows are the unsorted tail
+
+    Everything is read through np.memmap, so nothing grows on the heap with
+    the store: find() is a binary search over the sorted index plus a scan
+    of at most INDEX_TAIL_ROWS tail keys. A row becomes visible once its
+    offset is written (last), so readers in other processes never see a
+    half-written row. Appends across processes are serialized with a file lock.
+    """
+
+    BLOCK_ROWS = 65536      # rows scored per block during search
+    INDEX_TAIL_ROWS = 4096  # unsorted keys tolerated before the index is rebuilt
+
+    def __init__(self, directory, dim=512):
+        self.directory = directory
+        self.dim = dim
+        self.data_path = os.path.join(directory, "embeddings.f16")
+        self.ids_path = os.path.join(directory, "embeddings.ids.jsonl")
+        self.offsets_path = os.path.join(directory, "embeddings.offsets")
+        self.keys_path = os.path.join(directory, "embeddings.keys")
+        self.index_path = os.path.join(directory, "embeddings.keyindex")
+        self.lock_path = os.path.join(directory, "embeddings.lock")
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._count = 0
+        self._maps = {}          # name → (rows, memmap)
+        self._index = None       # (sorted keys, rows) memmaps
+        self._index_stat = None
+
+        if os.path.exists(self.ids_path) and not os.path.exists(self.offsets_path):
+            self._migrate()
+
+    # ——————————————————————
+    # Index maintenance
+    # ——————————————————————
+    def _refresh(self):
+        """Pick up rows appended since the last call (possibly by another process)."""
+        self._count = os.path.getsize(self.offsets_path) // 8 if os.path.exists(self.offsets_path) else 0
+        stat = os.stat(self.index_path) if os.path.exists(self.index_path) else None
+        stat = stat and (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stat != self._index_stat:
+            self._index = self._open_index() if stat else None
+            self._index_stat = stat
+
+    def _open_index(self):
+        with open(self.index_path, "rb") as f:
+            covered = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+        if covered == 0:
+            return None
+        keys = np.memmap(self.index_path, dtype=f"S{KEY_BYTES}", mode="r", offset=8, shape=(covered,))
+        rows = np.memmap(self.index_path, dtype="<u8", mode="r", offset=8 + KEY_BYTES * covered, shape=(covered,))
+        return keys, rows
+
+    def _map(self, name, path, dtype, shape):
+        """Memory-mapped view of the first self._count rows of a per-row file."""
+        if self._count == 0:
+            return None
+        cached = self._maps.get(name)
+        if cached is None or cached[0] != self._count:
+            cached = (self._count, np.memmap(path, dtype=dtype, mode="r", shape=shape))
+            self._maps[name] = cached
+        return cached[1]
+
+    def _rows(self):
+        return self._map("data", self.data_path, np.float16, (self._count, self.dim))
+
+    def _offsets(self):
+        return self._map("offsets", self.offsets_path, "<u8", (self._count,))
+
+    def _keys(self):
+        return self._map("keys", self.keys_path, f"S{KEY_BYTES}", (self._count,))
+
+    def _rebuild_index(self):
+        """
+        Re-sort every key into the index (caller holds the file lock). This
+        is the only step that reads all keys at once, and it runs once per
+        INDEX_TAIL_ROWS appends; the new index is swapped in with os.replace().
+        """
+        self._refresh()
+        keys = np.memmap(self.keys_path, dtype=f"S{KEY_BYTES}", mode="r", shape=(self._count,))
+        order = np.argsort(keys, kind="stable")
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(np.array([self._count], dtype="<u8").tobytes())
+            f.write(np.asarray(keys[order]).tobytes())
+            f.write(order.astype("<u8").tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        del keys
+        # Windows refuses to replace a file that is still mapped; the tail
+        # scan stays correct, so the rebuild is simply retried on a later append
+        self._index = None
+        self._index_stat = None
+        try:
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Embedding index rebuild deferred: {e}")
+
+    def _migrate(self):
+        """Build the offsets and keys files for a store that only has its JSON-lines sidecar."""
+        with file_lock(self.lock_path):
+            if os.path.exists(self.offsets_path):
+                return
+            with open(self.ids_path, "rb") as ids, \
+                    open(self.keys_path + ".tmp", "wb") as keys, \
+                    open(self.offsets_path + ".tmp", "wb") as offsets:
+                offset = 0
+                for line in ids:
+                    if not line.endswith(b"\n"):
+                        break
+                    meta = json.loads(line)
+                    key = meta.get("content_key")
+                    keys.write(_key_digest(key) if key else NO_KEY)
+                    offsets.write(np.array([offset], dtype="<u8").tobytes())
+                    offset += len(line)
+            os.replace(self.keys_path + ".tmp", self.keys_path)
+            os.replace(self.offsets_path + ".tmp", self.offsets_path)
+            self._rebuild_index()
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return self._count
+
+    # ——————————————————————
+    # Writes
+    # ——————————————————————
+    def append(self, vector, meta):
+        """
+        Append one embedding with its metadata and return its row number.
+        meta may include "content_key" for later lookup via find().
+        """
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Expected a {self.dim}-d vector, got {vector.shape[0]}")
+        key = meta.get("content_key")
+
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            row = self._count
+            # Truncate any bytes left by a writer that died before its offset
+            with open(self.data_path, "ab") as f:
+                f.truncate(row * self.dim * 2)
+                f.write(vector.astype(np.float16).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.keys_path, "ab") as f:
+                f.truncate(row * KEY_BYTES)
+                f.write(_key_digest(key) if key else NO_KEY)
+            ids_end = self._ids_end()
+            with open(self.ids_path, "ab") as f:
+                f.truncate(ids_end)
+                f.write((json.dumps(meta, default=str) + "\n").encode("utf-8"))
+                f.flush()
+            with open(self.offsets_path, "ab") as f:
+                f.truncate(row * 8)
+                f.write(np.array([ids_end], dtype="<u8").tobytes())
+                f.flush()
+            self._refresh()
+
+            covered = self._index[0].shape[0] if self._index else 0
+            if self._count - covered > self.INDEX_TAIL_ROWS:
+                self._rebuild_index()
+        return row
+
+    def _ids_end(self):
+        """Byte length of the metadata lines of the visible rows."""
+        if self._count == 0:
+            return 0
+        with open(self.ids_path, "rb") as f:
+            f.seek(int(self._offsets()[-1]))
+            return f.tell() + len(f.readline())
+
+    # ——————————————————————
+    # Reads
+    # ——————————————————————
+    def find(self, content_key):
+        """Row holding the embedding for this content key, or None."""
+        digest = np.array(_key_digest(content_key), dtype=f"S{KEY_BYTES}")
+        with self._lock:
+            self._refresh()
+            if self._count == 0:
+                return None
+            covered = 0
+            if self._index is not None:
+                keys, rows = self._index
+                covered = keys.shape[0]
+                pos = int(np.searchsorted(keys, digest))
+                if pos < covered and keys[pos] == digest:
+                    return int(rows[pos])
+            tail = np.flatnonzero(self._keys()[covered:] == digest)
+            return int(tail[0]) + covered if tail.size else None
+
+    def get(self, row):
+        """Embedding at row as float32."""
+        with self._lock:
+            self._refresh()
+            return np.array(self._rows()[row], dtype=np.float32)
+
+    def meta(self, row):
+        with self._lock:
+            self._refresh()
+            offset = int(self._offsets()[row])
+        with open(self.ids_path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def search(self, vector, k=5):
+        """
+        Top-k rows by cosine similarity (embeddings are normalized, so a dot
+        product). Scans the memory-mapped matrix block by block; memory use
+        is bounded by BLOCK_ROWS regardless of store size.
+        Returns [{"row", "similarity", "meta"}] sorted by similarity.
+        """
+        query = np.asarray(vector, dtype=np.float32).reshape(-1)
+        with self._lock:
+            self._refresh()
+            matrix = self._rows()
+        if matrix is None or k <= 0:
+            return []
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, matrix.shape[0], self.BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + self.BLOCK_ROWS], dtype=np.float32)
+            scores = block @ query
+            if scores.shape[0] > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(scores.shape[0])
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            if best_scores.shape[0] > k:
+                keep = np.argpartition(-best_scores, k - 1)[:k]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores)
+        return [
+            {"row": int(best_rows[i]), "similarity": round(float(best_scores[i]), 4), "meta": self.meta(int(best_rows[i]))}
+            for i in order
+        ]
@@ -0,0 +1,43 @@
+# utils/file_lock.py
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue  # LK_LOCK gives up after ~10s; keep waiting
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+        return
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Exclusive lock on path (created if missing) for the with block, held
+    across processes: fcntl.flock on POSIX, msvcrt.locking on Windows.
+    """
+    with open(path, "a+") as f:
+        _lock(f)
+        try:
+            yield
+        finally:
+            _unlock(f)
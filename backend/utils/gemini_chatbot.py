@@ -1,20 +1,12 @@
 # utils/gemini_chatbot.py
 
+import threading
 import google.generativeai as genai
 from config import Config
 
 genai.configure(api_key=Config.GOOGLE_API_KEY)
 
-def get_chat_response(message: str, chat_history: list = None):
-    """
-    Get response from Gemini — allows any relevant link.
-    :param message: Current user message
-    :param chat_history: List of {"role": "...", "parts": ["..."]} for context
-    :return: Bot reply (str), including links
-    """
-    model = genai.GenerativeModel(
-        model_name="gemini-2.0-flash",
-        system_instruction="""
+SYSTEM_INSTRUCTION = """
 You are a kind, helpful assistant.
 - Answer clearly and supportively.
 - If a website, guide, video, or resource can help, include the full link.
@@ -23,11 +15,103 @@ You are a kind, helpful assistant.
 - Ensure at least one helpful url is there
 Keep responses concise (1-3 sentences).
         """
-    )
 
+FALLBACK_REPLY = "I'm having trouble responding right now. Please try again later."
+
+SUMMARY_PROMPT = """
+You keep a running summary of a support chat between a user in addiction
+recovery and an assistant. Update the summary with the new turns below.
+Keep what matters for future replies: the user's situation, goals,
+struggles, progress, preferences and any advice already given.
+At most 150 words. Plain text, no markdown.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+
+Updated summary:
+"""
+
+_model = None
+_summary_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """The chat model, built once per process and shared by every request."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = genai.GenerativeModel(
+                    model_name="gemini-2.0-flash",
+                    system_instruction=SYSTEM_INSTRUCTION
+                )
+    return _model
+
+
+def get_summary_model():
+    global _summary_model
+    if _summary_model is None:
+        with _model_lock:
+            if _summary_model is None:
+                _summary_model = genai.GenerativeModel(model_name="gemini-2.0-flash")
+    return _summary_model
+
+
+def count_tokens(chat_history: list, message: str):
+    """Prompt tokens for this history + message (system instruction included)."""
+    contents = list(chat_history or []) + [{"role": "user", "parts": [message]}]
+    return get_model().count_tokens(contents).total_tokens
+
+
+def summarize_turns(summary: str, turns: list):
+    """
+    Fold turns ([{"user", "bot"}, ...]) into the running summary and return
+    the new summary. Raises on failure so the caller keeps the old one.
+    """
+    lines = "\n".join(f"User: {t['user']}\nAssistant: {t['bot']}" for t in turns)
+    prompt = SUMMARY_PROMPT.format(summary=summary or "(none yet)", turns=lines)
+    return get_summary_model().generate_content(prompt).text.strip()
+
+
+def get_chat_response(message: str, chat_history: list = None):
+    """
+    Get response from Gemini — allows any relevant link.
+    :param message: Current user message
+    :param chat_history: List of {"role": "...", "parts": ["..."]} for context
+    :return: Bot reply (str), including links
+    """
     try:
-        chat = model.start_chat(history=chat_history or [])
+        chat = get_model().start_chat(history=chat_history or [])
         response = chat.send_message(message)
         return response.text.strip()
     except Exception as e:
-        return "I'm having trouble responding right now. Please try again later."
\ No newline at end of file
+        return FALLBACK_REPLY
+
+
+def stream_chat_response(message: str, chat_history: list = None, outcome: dict = None):
+    """
+    Same as get_chat_response, but yields the reply in pieces as Gemini
+    produces them. If the call fails before anything was produced, the
+    fallback reply is yielded instead.
+    :param outcome: optional dict; outcome["complete"] is set to True only
+                    when Gemini finished the reply (not cut off, not the fallback)
+    """
+    outcome = outcome if outcome is not None else {}
+    outcome["complete"] = False
+    produced = False
+    try:
+        chat = get_model().start_chat(history=chat_history or [])
+        for chunk in chat.send_message(message, stream=True):
+            text = chunk.text
+            if text:
+                produced = True
+                yield text
+        outcome["complete"] = produced
+    except Exception as e:
+        print(f"Gemini streaming error: {e}")
+        if not produced:
+            yield FALLBACK_REPLY
@@ -0,0 +1,76 @@
+# utils/image_ingest.py
+import io
+import numpy as np
+from PIL import Image, ImageOps
+
+
+class InvalidImageError(ValueError):
+    """Raised when an upload cannot be decoded as an image."""
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload is larger than the caller's byte limit."""
+
+
+def read_upload(file_storage, max_bytes=None):
+    """
+    Read an uploaded file (werkzeug FileStorage) into memory without touching disk.
+    With max_bytes, at most one byte more than the limit is read before
+    UploadTooLargeError is raised.
+    """
+    file_storage.stream.seek(0)
+    if not max_bytes:
+        return file_storage.stream.read()
+    data = file_storage.stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise UploadTooLargeError(f"Upload is larger than {max_bytes // (1024 * 1024)} MB")
+    return data
+
+
+def decode_image(data, min_side=None, max_side=None):
+    """
+    Decode image bytes into an upright RGB PIL image, downscaled as early as possible.
+
+    - min_side: shortest side is reduced to no less than this (e.g. CLIP's 224px input)
+    - max_side: longest side is reduced to at most this (e.g. for face detection)
+
+    JPEGs are reduced while decoding (PIL draft mode picks the smallest DCT
+    scale that is still large enough), so a 12MP photo is never fully
+    decompressed. EXIF orientation is applied before the final resize.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        width, height = image.size
+
+        scale = 1.0
+        if min_side:
+            scale = min(scale, min_side / min(width, height))
+        if max_side:
+            scale = min(scale, max_side / max(width, height))
+
+        if scale < 1.0 and image.format == "JPEG":
+            image.draft("RGB", (max(1, int(width * scale)), max(1, int(height * scale))))
+
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    except Exception as e:
+        raise InvalidImageError(f"Could not decode image: {e}")
+
+    if scale < 1.0:
+        # Orientation may have swapped the axes; recompute against the upright size
+        width, height = image.size
+        scale = 1.0
+        if min_side:
+            scale = min(scale, min_side / min(width, height))
+        if max_side:
+            scale = min(scale, max_side / max(width, height))
+        if scale < 1.0:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = image.resize(size, Image.BICUBIC)
+    return image
+
+
+def to_bgr_array(image):
+    """
+    PIL RGB image → contiguous BGR uint8 array, the layout OpenCV expects.
+    """
+    return np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
@@ -0,0 +1,99 @@
+# utils/keyword_matcher.py
+import re
+from collections import deque
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text):
+    """Lowercase, unify curly apostrophes and collapse runs of whitespace."""
+    return _WHITESPACE.sub(" ", text.lower().replace("’", "'")).strip()
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a categorized lexicon
+    ({"stress": ["panic", "can't cope", ...], ...}).
+
+    match() scans the text once, whatever the lexicon size, and only
+    reports terms that start and end on a word boundary, so "high" does
+    not match inside "highway" nor "cry" inside "crystal".
+    """
+
+    def __init__(self, lexicon):
+        self.categories = list(lexicon)
+        self.terms = []           # term index → (category, term, order in lexicon)
+        self._goto = [{}]         # node → {char: node}
+        self._fail = [0]
+        self._out = [[]]          # node → term indexes ending here (incl. via fail links)
+
+        seen = set()
+        for category, words in lexicon.items():
+            for order, word in enumerate(words):
+                term = normalize(word)
+                if not term or (category, term) in seen:
+                    continue
+                seen.add((category, term))
+                self._add(term, len(self.terms))
+                self.terms.append((category, term, order))
+        self._build_links()
+
+    def _add(self, term, index):
+        node = 0
+        for ch in term:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(index)
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self):
+        return len(self.terms)
+
+    def match(self, text):
+        """
+        {category: [matched terms]} for categories with at least one hit.
+        Terms are listed in lexicon order, each once.
+        """
+        text = normalize(text)
+        goto, fail, out, terms = self._goto, self._fail, self._out, self.terms
+        found = set()
+        node = 0
+        for end, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for index in out[node]:
+                start = end - len(terms[index][1]) + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end + 1 < len(text) and _is_word_char(text[end + 1]):
+                    continue
+                found.add(index)
+
+        issues = {}
+        for index in sorted(found, key=lambda i: (self.categories.index(terms[i][0]), terms[i][2])):
+            category, term, _ = terms[index]
+            issues.setdefault(category, []).append(term)
+        return issues
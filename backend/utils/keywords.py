@@ -1,3 +1,13 @@
+# utils/keywords.py
+import hashlib
+import json
+import os
+import threading
+import time
+from config import Config
+from utils.analysis_cache import analysis_cache, cached
+from utils.keyword_matcher import KeywordMatcher, normalize
+
 # Keywords indicating stress, depression, or drug use
 STRESS_KEYWORDS = [
     "stressed", "overwhelmed", "burnt out", "can't cope", "pressure", "panic"
@@ -13,11 +23,158 @@ DRUG_KEYWORDS = [
     "withdrawal", "using again","drugs"
 ]
 
-def check_keywords(text):
-    text_lower = text.lower()
-    issues = {
-        "stress": [kw for kw in STRESS_KEYWORDS if kw in text_lower],
-        "depression": [kw for kw in DEPRESSION_KEYWORDS if kw in text_lower],
-        "substance": [kw for kw in DRUG_KEYWORDS if kw in text_lower]
+# Built-in lexicon, used when KEYWORD_LEXICON_SOURCE is "builtin" or the
+# configured source has nothing in it
+DEFAULT_LEXICON = {
+    "stress": STRESS_KEYWORDS,
+    "depression": DEPRESSION_KEYWORDS,
+    "substance": DRUG_KEYWORDS
+}
+
+
+# ——————————————————————
+# Lexicon loading
+# ——————————————————————
+def _load_from_file(path):
+    """JSON file: {"stress": [...], "depression": [...], "substance": [...]}"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_from_db():
+    """keyword_lexicon collection: one {"category": ..., "terms": [...]} document per category."""
+    from utils.db import keyword_lexicon_collection
+    return {doc["category"]: doc.get("terms", []) for doc in keyword_lexicon_collection.find({}, {"_id": 0})}
+
+
+def load_lexicon(source=None):
+    source = source or Config.KEYWORD_LEXICON_SOURCE
+    if source == "file":
+        lexicon = _load_from_file(Config.KEYWORD_LEXICON_FILE)
+    elif source == "db":
+        lexicon = _load_from_db()
+    elif source == "builtin":
+        lexicon = None
+    else:
+        raise ValueError(f"Unknown KEYWORD_LEXICON_SOURCE: {source}")
+    return lexicon or DEFAULT_LEXICON
+
+
+def lexicon_version(lexicon):
+    """Short content hash; changes whenever any term or category changes."""
+    canonical = json.dumps(
+        {category: sorted({normalize(t) for t in terms}) for category, terms in lexicon.items()},
+        sort_keys=True
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+# ——————————————————————
+# Active matcher (swapped atomically on reload)
+# ——————————————————————
+class _Active:
+    def __init__(self, matcher, version, source):
+        self.matcher = matcher
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+
+
+_active = None
+_reload_lock = threading.Lock()
+_last_check = 0.0
+_file_mtime = None
+_last_error = None
+
+
+def reload_lexicon(source=None):
+    """
+    Load the lexicon and compile a new matcher, then swap it in with one
+    reference assignment: requests in flight keep the matcher they started
+    with, new requests see the new one. Cached keyword results for the old
+    lexicon are dropped. Returns the status after the reload.
+    """
+    global _active, _file_mtime, _last_error
+    source = source or Config.KEYWORD_LEXICON_SOURCE
+    with _reload_lock:
+        try:
+            if source == "file":
+                _file_mtime = os.path.getmtime(Config.KEYWORD_LEXICON_FILE)
+            lexicon = load_lexicon(source)
+        except Exception as e:
+            _last_error = f"{type(e).__name__}: {e}"
+            raise
+        _last_error = None
+        version = lexicon_version(lexicon)
+        if _active is None or _active.version != version:
+            old = _active
+            _active = _Active(KeywordMatcher(lexicon), version, source)
+            if old is not None:
+                analysis_cache.clear(prefix=f"keywords:{old.version}:")
+        return get_lexicon_status()
+
+
+def _maybe_reload():
+    """
+    Pick up lexicon edits without a restart. Checked at most every
+    KEYWORD_LEXICON_RELOAD_SECONDS (0 disables); for the file source only
+    a changed mtime triggers a rebuild.
+    """
+    global _last_check
+    interval = Config.KEYWORD_LEXICON_RELOAD_SECONDS
+    now = time.monotonic()
+    if not interval or now - _last_check < interval or Config.KEYWORD_LEXICON_SOURCE == "builtin":
+        return
+    _last_check = now
+    try:
+        if Config.KEYWORD_LEXICON_SOURCE == "file" and os.path.getmtime(Config.KEYWORD_LEXICON_FILE) == _file_mtime:
+            return
+        reload_lexicon()
+    except Exception as e:
+        print(f"Keyword lexicon reload failed, keeping version {_active.version}: {e}")
+
+
+def _use_default_lexicon(error):
+    """First load failed (missing or malformed source): serve DEFAULT_LEXICON until a reload succeeds."""
+    global _active
+    with _reload_lock:
+        if _active is None:
+            print(f"Keyword lexicon load failed, using the built-in lexicon: {error}")
+            _active = _Active(KeywordMatcher(DEFAULT_LEXICON), lexicon_version(DEFAULT_LEXICON), "builtin")
+
+
+def get_matcher():
+    """
+    The active matcher. Never raises on a bad lexicon source: the last good
+    matcher (or DEFAULT_LEXICON on first load) keeps serving.
+    """
+    if _active is None:
+        try:
+            reload_lexicon()
+        except Exception as e:
+            _use_default_lexicon(e)
+    else:
+        _maybe_reload()
+    return _active
+
+
+def get_lexicon_status():
+    active = _active
+    if active is None:
+        return {"loaded": False, "source": Config.KEYWORD_LEXICON_SOURCE, "last_error": _last_error}
+    return {
+        "loaded": True,
+        "source": active.source,
+        "configured_source": Config.KEYWORD_LEXICON_SOURCE,
+        "last_error": _last_error,
+        "version": active.version,
+        "terms": len(active.matcher),
+        "categories": active.matcher.categories,
+        "loaded_at": active.loaded_at
     }
-    return {k: v for k, v in issues.items() if v}
\ No newline at end of file
+
+
+def check_keywords(text):
+    active = get_matcher()
+    # The lexicon version is part of the key, so a reload never serves stale matches
+    return cached(f"keywords:{active.version}", normalize, active.matcher.match, text)
@@ -0,0 +1,120 @@
+# utils/model_registry.py
+import threading
+import time
+from config import Config
+
+
+_torch_threads_set = False
+
+
+def configure_torch_threads():
+    """
+    Apply TORCH_NUM_THREADS once per process, before the first torch model
+    loads. torch's intra-op thread pool is process-wide: CLIP, Whisper, the
+    torch sentiment pipeline and the chat embedder all share it, so there
+    is one knob rather than one per model.
+    """
+    global _torch_threads_set
+    if _torch_threads_set:
+        return
+    _torch_threads_set = True
+    if Config.TORCH_NUM_THREADS:
+        import torch
+        torch.set_num_threads(Config.TORCH_NUM_THREADS)
+
+
+class ModelDisabledError(RuntimeError):
+    """Raised when a model is requested that this process was started without."""
+
+
+class ModelRegistry:
+    """
+    Central place for the app's ML models. Each model is registered with a
+    loader function and is only loaded the first time it is requested
+    (or during warmup). Loading is thread-safe and happens once.
+    """
+
+    def __init__(self, enabled=None):
+        # None means every registered model is enabled
+        self.enabled = set(enabled) if enabled is not None else None
+        self._loaders = {}
+        self._models = {}
+        self._state = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+            self._state.setdefault(name, {
+                "state": "not_loaded" if self.is_enabled(name) else "disabled",
+                "load_seconds": None,
+                "error": None
+            })
+
+    def is_enabled(self, name):
+        return self.enabled is None or name in self.enabled
+
+    def get(self, name):
+        if name in self._models:
+            return self._models[name]
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+        if not self.is_enabled(name):
+            raise ModelDisabledError(f"Model '{name}' is not enabled in this process")
+
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            if name in self._models:
+                return self._models[name]
+
+            self._state[name].update(state="loading", error=None)
+            start = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                self._state[name].update(
+                    state="failed",
+                    error=str(e),
+                    load_seconds=round(time.perf_counter() - start, 3)
+                )
+                raise
+            self._models[name] = model
+            self._state[name].update(state="ready", load_seconds=round(time.perf_counter() - start, 3))
+            return model
+
+    def warmup(self, names=None, background=True):
+        """
+        Load the given (default: all enabled) models ahead of the first
+        request. Failures are recorded in status() rather than raised.
+        """
+        names = [n for n in (names or list(self._loaders)) if self.is_enabled(n)]
+
+        def _load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Model warmup failed for {name}: {e}")
+
+        if not background:
+            _load_all()
+            return None
+        thread = threading.Thread(target=_load_all, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        return {name: dict(state) for name, state in self._state.items()}
+
+    def ready(self):
+        """True when every enabled model has loaded successfully."""
+        return all(
+            state["state"] == "ready"
+            for name, state in self._state.items()
+            if self.is_enabled(name)
+        )
+
+
+registry = ModelRegistry(enabled=Config.ENABLED_MODELS)
@@ -0,0 +1,158 @@
+# utils/onnx_classifier.py
+import json
+import os
+import threading
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from utils.file_lock import file_lock
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "model_cache")
+
+_export_lock = threading.Lock()
+
+
+def _artifact_dir(model_name, cache_dir):
+    return os.path.join(cache_dir, model_name.replace("/", "__"))
+
+
+def export_onnx(model_name, cache_dir=DEFAULT_CACHE_DIR, quantize=False):
+    """
+    Export a Hugging Face sequence classifier to ONNX (once) and return the
+    path of the requested artifact. With quantize=True an int8 dynamically
+    quantized copy is produced next to the fp32 export.
+    Exports are serialized across threads and across processes (e.g.
+    gunicorn workers cold-starting together) with a file lock.
+    """
+    out_dir = _artifact_dir(model_name, cache_dir)
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+    os.makedirs(out_dir, exist_ok=True)
+
+    with _export_lock, file_lock(os.path.join(out_dir, "export.lock")):
+        if not os.path.exists(fp32_path):
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModelForSequenceClassification.from_pretrained(model_name)
+            model.eval()
+
+            sample = tokenizer(["export sample"], return_tensors="pt")
+            tmp_path = f"{fp32_path}.{os.getpid()}.tmp"
+            with torch.no_grad():
+                torch.onnx.export(
+                    model,
+                    (sample["input_ids"], sample["attention_mask"]),
+                    tmp_path,
+                    input_names=["input_ids", "attention_mask"],
+                    output_names=["logits"],
+                    dynamic_axes={
+                        "input_ids": {0: "batch", 1: "sequence"},
+                        "attention_mask": {0: "batch", 1: "sequence"},
+                        "logits": {0: "batch"}
+                    },
+                    opset_version=17
+                )
+            tokenizer.save_pretrained(out_dir)
+            with open(os.path.join(out_dir, "labels.json"), "w") as f:
+                json.dump({int(k): v for k, v in model.config.id2label.items()}, f)
+            # Rename last so a half-written export is never picked up
+            os.replace(tmp_path, fp32_path)
+
+        if quantize and not os.path.exists(int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            tmp_path = f"{int8_path}.{os.getpid()}.tmp"
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+
+    return int8_path if quantize else fp32_path
+
+
+class OnnxTextClassifier:
+    """
+    Drop-in replacement for a transformers "text-classification" pipeline,
+    backed by ONNX Runtime on CPU. Supports the call shapes used in this
+    repo: a single string or a list of strings, with top_k=1 (default) or
+    top_k=None for the full label distribution.
+    """
+
+    def __init__(self, model_name, quantize=False, cache_dir=DEFAULT_CACHE_DIR, num_threads=0):
+        import onnxruntime as ort
+
+        model_path = export_onnx(model_name, cache_dir, quantize=quantize)
+        out_dir = os.path.dirname(model_path)
+
+        self.model_name = model_name
+        self.quantized = quantize
+        self.tokenizer = AutoTokenizer.from_pretrained(out_dir)
+        with open(os.path.join(out_dir, "labels.json")) as f:
+            self.id2label = {int(k): v for k, v in json.load(f).items()}
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+    def _scores(self, texts, batch_size):
+        probs = []
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            encoded = self.tokenizer(chunk, padding=True, return_tensors="np")
+            logits = self.session.run(
+                ["logits"],
+                {
+                    "input_ids": encoded["input_ids"].astype(np.int64),
+                    "attention_mask": encoded["attention_mask"].astype(np.int64)
+                }
+            )[0]
+            # Softmax, same as the pipeline's default for single-label models
+            logits = logits - logits.max(axis=1, keepdims=True)
+            exp = np.exp(logits)
+            probs.append(exp / exp.sum(axis=1, keepdims=True))
+        return np.concatenate(probs, axis=0)
+
+    def __call__(self, inputs, batch_size=8, top_k=1, **kwargs):
+        single = isinstance(inputs, str)
+        texts = [inputs] if single else list(inputs)
+        probs = self._scores(texts, max(1, batch_size))
+
+        results = []
+        for row in probs:
+            ranked = [
+                {"label": self.id2label[i], "score": float(row[i])}
+                for i in np.argsort(-row)
+            ]
+            results.append(ranked if top_k is None else ranked[:top_k])
+
+        if top_k == 1:
+            # Pipeline returns one dict per input when top_k is 1
+            results = [r[0] for r in results]
+        return results if not single or top_k == 1 else results[0]
+
+
+def check_parity(onnx_classifier, torch_classifier, texts, tolerance=0.02):
+    """
+    Compare top-1 label and score of the ONNX classifier against the PyTorch
+    pipeline. Returns a report dict; "ok" is True when every label matches
+    and every score is within tolerance.
+    """
+    mismatches = []
+    max_delta = 0.0
+    for text in texts:
+        expected = torch_classifier(text)[0]
+        actual = onnx_classifier(text)[0]
+        delta = abs(expected["score"] - actual["score"])
+        max_delta = max(max_delta, delta)
+        if expected["label"] != actual["label"] or delta > tolerance:
+            mismatches.append({
+                "text": text,
+                "torch": expected,
+                "onnx": actual,
+                "delta": round(delta, 4)
+            })
+    return {
+        "ok": not mismatches,
+        "samples": len(texts),
+        "tolerance": tolerance,
+        "max_score_delta": round(max_delta, 4),
+        "mismatches": mismatches
+    }
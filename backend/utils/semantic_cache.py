@@ -0,0 +1,148 @@
+# utils/semantic_cache.py
+import threading
+import time
+import numpy as np
+from config import Config
+from utils.model_registry import configure_torch_threads, registry
+
+
+class SentenceEncoder:
+    """
+    Small sentence-embedding model (default all-MiniLM-L6-v2) run through
+    transformers on CPU: mean-pooled token embeddings, L2-normalized.
+    """
+
+    def __init__(self, model_name):
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+        configure_torch_threads()
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name)
+        self.model.eval()
+
+    def encode(self, texts):
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=128, return_tensors="pt")
+        with self.torch.inference_mode():
+            tokens = self.model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).to(tokens.dtype)
+        pooled = (tokens * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        pooled = self.torch.nn.functional.normalize(pooled, dim=-1)
+        return pooled.numpy().astype(np.float32)
+
+
+def load_sentence_encoder():
+    return SentenceEncoder(Config.CHAT_CACHE_MODEL)
+
+
+# Only registered when the cache is on, so warmup never loads it otherwise
+if Config.CHAT_SEMANTIC_CACHE:
+    registry.register("chat_embedder", load_sentence_encoder)
+
+
+class SemanticCache:
+    """
+    In-process nearest-neighbour cache of (question embedding → reply).
+
+    Embeddings live in one preallocated (maxsize, dim) matrix, so a lookup
+    is a single matrix-vector product. Entries expire after ttl seconds;
+    when the cache is full the least recently used entry is replaced.
+    """
+
+    def __init__(self, maxsize=2048, ttl=86400, threshold=0.92):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._matrix = None                       # allocated on first insert (dim known then)
+        self._expires = np.zeros(maxsize)         # 0 = empty slot
+        self._last_used = np.zeros(maxsize)
+        self._entries = [None] * maxsize          # {"question", "reply"}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+        self.evictions = 0
+
+    def lookup(self, vector):
+        """Stored entry for the most similar live question, if above threshold."""
+        now = time.monotonic()
+        with self._lock:
+            live = self._expires > now
+            if self._matrix is None or not live.any():
+                self.misses += 1
+                return None
+            scores = np.where(live, self._matrix @ vector, -1.0)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            self._last_used[best] = now
+            self.hits += 1
+            return {**self._entries[best], "similarity": round(float(scores[best]), 4)}
+
+    def insert(self, vector, question, reply):
+        now = time.monotonic()
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.maxsize, vector.shape[0]), dtype=np.float32)
+            # First choice: an empty or expired slot; otherwise evict the LRU entry
+            free = np.flatnonzero(self._expires <= now)
+            if free.size:
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.evictions += 1
+            self._matrix[slot] = vector
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._entries[slot] = {"question": question, "reply": reply}
+            self.inserts += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": int((self._expires > time.monotonic()).sum()),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "inserts": self.inserts,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+chat_cache = SemanticCache(
+    maxsize=Config.CHAT_CACHE_SIZE,
+    ttl=Config.CHAT_CACHE_TTL,
+    threshold=Config.CHAT_CACHE_THRESHOLD
+)
+
+
+def find_reply(message, history):
+    """
+    Cached reply for a first-turn message (no prior history), or None.
+    Returns (reply, embedding); pass the embedding to remember_reply() on a
+    miss so the message is not embedded twice.
+    """
+    if not Config.CHAT_SEMANTIC_CACHE or history:
+        return None, None
+    try:
+        vector = registry.get("chat_embedder").encode([message.strip()])[0]
+    except Exception as e:
+        print(f"Chat cache embedding failed: {e}")
+        return None, None
+    entry = chat_cache.lookup(vector)
+    return (entry["reply"] if entry else None), vector
+
+
+def remember_reply(vector, message, reply):
+    if vector is not None and reply:
+        chat_cache.insert(vector, message.strip(), reply)
+
+
+def get_chat_cache_stats():
+    return {"enabled": Config.CHAT_SEMANTIC_CACHE, **chat_cache.stats()}
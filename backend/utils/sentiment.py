@@ -1,15 +1,146 @@
 # utils/sentiment.py
-from transformers import pipeline
-import torch
 import re
+from config import Config
+from utils.batching import MicroBatcher
+from utils.analysis_cache import cached
+from utils.model_registry import configure_torch_threads, registry, ModelDisabledError
 
-# Load emotion model once
-classifier = pipeline(
-    "text-classification",
-    model="j-hartmann/emotion-english-distilroberta-base",
-    device=0 if torch.cuda.is_available() else -1
+MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
+
+
+def load_classifier(backend=None):
+    """
+    Build the emotion classifier for the configured backend:
+    - "torch": transformers pipeline (GPU if available)
+    - "onnx": ONNX Runtime on CPU
+    - "onnx-int8": ONNX Runtime with a dynamically quantized int8 model
+    """
+    backend = backend or Config.SENTIMENT_BACKEND
+    if backend in ("onnx", "onnx-int8"):
+        from utils.onnx_classifier import OnnxTextClassifier
+        return OnnxTextClassifier(
+            MODEL_NAME,
+            quantize=backend == "onnx-int8",
+            cache_dir=Config.MODEL_CACHE_DIR,
+            num_threads=Config.SENTIMENT_NUM_THREADS
+        )
+    if backend != "torch":
+        raise ValueError(f"Unknown SENTIMENT_BACKEND: {backend}")
+
+    import torch
+    from transformers import pipeline
+    configure_torch_threads()
+    return pipeline(
+        "text-classification",
+        model=MODEL_NAME,
+        device=0 if torch.cuda.is_available() else -1
+    )
+
+
+# Loaded lazily on first use (or during warmup)
+registry.register("sentiment", load_classifier)
+
+
+def get_classifier():
+    return registry.get("sentiment")
+
+
+def _classify_batch(texts):
+    """
+    Run one batched forward pass. If the batch fails (e.g. one text is too
+    long for the model), fall back to per-text calls so a single bad input
+    only fails its own caller.
+    """
+    classifier = get_classifier()
+    try:
+        return classifier(texts, batch_size=len(texts))
+    except Exception:
+        results = []
+        for text in texts:
+            try:
+                results.append(classifier(text)[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+# Batches concurrent /api/analyze calls into one forward pass
+sentiment_batcher = MicroBatcher(
+    _classify_batch,
+    max_batch_size=Config.SENTIMENT_MAX_BATCH_SIZE,
+    window_ms=Config.SENTIMENT_BATCH_WINDOW_MS,
+    max_queue=Config.SENTIMENT_MAX_QUEUE,
+    name="sentiment-batcher"
 )
 
+
+def classify(text):
+    """
+    Top-1 emotion prediction for one text: {"label": ..., "score": ...}
+    """
+    if Config.SENTIMENT_BATCHING:
+        result = sentiment_batcher(text)
+    else:
+        result = get_classifier()(text)[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def split_into_windows(text):
+    """
+    Split text into overlapping windows of at most SENTIMENT_CHUNK_TOKENS
+    tokens. Returns None when the text fits in a single window.
+
+    At most SENTIMENT_MAX_WINDOWS windows are kept; for longer inputs the
+    windows are picked evenly across the text so the start, middle and end
+    are all represented and the cost per request stays bounded.
+    """
+    tokenizer = get_classifier().tokenizer
+    ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    size = Config.SENTIMENT_CHUNK_TOKENS
+    if len(ids) <= size:
+        return None
+
+    stride = max(1, size - Config.SENTIMENT_CHUNK_OVERLAP)
+    starts = list(range(0, len(ids) - size, stride)) + [len(ids) - size]
+
+    max_windows = Config.SENTIMENT_MAX_WINDOWS
+    if len(starts) > max_windows:
+        step = (len(starts) - 1) / (max_windows - 1) if max_windows > 1 else 0
+        starts = sorted({starts[round(i * step)] for i in range(max_windows)})
+
+    return [
+        {"text": tokenizer.decode(ids[start:start + size]), "tokens": len(ids[start:start + size])}
+        for start in starts
+    ]
+
+
+def classify_windows(windows):
+    """
+    Score all windows in one batched call and aggregate them.
+
+    Aggregation rule: average each label's probability across windows,
+    weighted by the window's token count, then take the label with the
+    highest averaged probability. Its averaged probability is the
+    confidence.
+    """
+    texts = [w["text"] for w in windows]
+    per_window = get_classifier()(texts, batch_size=len(texts), top_k=None)
+
+    totals = {}
+    weight_sum = sum(w["tokens"] for w in windows)
+    for window, scores in zip(windows, per_window):
+        for entry in scores:
+            totals[entry["label"]] = totals.get(entry["label"], 0.0) + entry["score"] * window["tokens"]
+
+    label = max(totals, key=totals.get)
+    return label, totals[label] / weight_sum
+
+
+def get_batching_stats():
+    return {"enabled": Config.SENTIMENT_BATCHING, **sentiment_batcher.stats()}
+
 # Emoji to emotion mapping
 EMOJI_TO_EMOTION = {
     "😊": "happy", "😄": "happy", "😁": "happy", "❤️": "loved", "💕": "loved",
@@ -71,6 +202,20 @@ def has_negation(text: str) -> bool:
 
 
 def analyze_sentiment(text):
+    """
+    Cached wrapper: identical inputs (after stripping) reuse the stored
+    result. Failed model calls are never cached.
+    """
+    return cached(
+        "sentiment",
+        str.strip,
+        _analyze_sentiment,
+        text,
+        cacheable=lambda result: result["source"] != "error"
+    )
+
+
+def _analyze_sentiment(text):
     original_text = text.strip()
     if not original_text:
         return {
@@ -108,9 +253,15 @@ def analyze_sentiment(text):
 
     # Step 3: Use AI model on text
     try:
-        result = classifier(original_text)[0]
-        label = result['label']
-        confidence = result['score']
+        windows = split_into_windows(original_text) if Config.SENTIMENT_CHUNKING else None
+        if windows:
+            label, confidence = classify_windows(windows)
+            source = "ai_model_chunked"
+        else:
+            result = classify(original_text)
+            label = result['label']
+            confidence = result['score']
+            source = "ai_model"
 
         emotion_map = {
             "joy": "happy",
@@ -131,9 +282,11 @@ def analyze_sentiment(text):
             "mood": mood,
             "emotion": emotion,
             "confidence": round(confidence, 3),
-            "source": "ai_model"
+            "source": source
         }
 
+    except ModelDisabledError:
+        raise
     except Exception as e:
         print("Error in emotion detection:", str(e))
         return {
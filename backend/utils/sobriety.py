@@ -4,16 +4,24 @@ import cv2
 import numpy as np
 import os
 from datetime import datetime
+from config import Config
+from utils.model_registry import registry
 
 # Path to Haar Cascade file (only face needed)
 CASCADE_DIR = os.path.join(os.path.dirname(__file__), "haar_cascades")
 FACE_CASCADE_PATH = os.path.join(CASCADE_DIR, "haarcascade_frontalface_default.xml")
 
-# Load face detector
-face_cascade = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+def load_face_cascade():
+    """
+    Load face detector
+    """
+    face_cascade = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+    if face_cascade.empty():
+        raise FileNotFoundError(f"Could not load face cascade from {FACE_CASCADE_PATH}")
+    return face_cascade
 
-if face_cascade.empty():
-    raise FileNotFoundError(f"Could not load face cascade from {FACE_CASCADE_PATH}")
+
+registry.register("haar", load_face_cascade)
 
 # Thresholds
 REDNESS_THRESHOLD = 0.55        # Normalized redness score (0–1)
@@ -21,23 +29,30 @@ DROOP_THRESHOLD_RATIO = 0.35    # Width/height ratio: higher = droopier
 MIN_EYE_WIDTH = 20              # Minimum valid eye width (px)
 
 
-def analyze_sobriety(image_path: str):
+def analyze_sobriety(image, fast=None):
     """
     Analyze sobriety using only OpenCV:
     - Detect face with Haar Cascade
     - Estimate eye positions based on face region
     - Analyze eye redness and droop
+    fast (default SOBRIETY_FAST_PATH) detects on a downscaled copy and
+    scores both eyes in one NumPy expression; fast=False is the original
+    full-resolution path, kept as the reference for scripts/bench_sobriety.py.
     Returns: {
         "is_sober": bool,
         "flags": list,
         "image_analysis": dict
     }
     """
-    # Read image
-    image = cv2.imread(image_path)
+    # Read image (path, or an already-decoded BGR array from utils/image_ingest.py)
+    if isinstance(image, str):
+        image = cv2.imread(image)
     if image is None:
         return {"error": "Could not load image"}
 
+    if Config.SOBRIETY_FAST_PATH if fast is None else fast:
+        return _analyze_sobriety_fast(image)
+
     # Convert to grayscale
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     h, w = image.shape[:2]
@@ -45,6 +60,7 @@ def analyze_sobriety(image_path: str):
     # ——————————————————————
     # 1. Detect Face
     # ——————————————————————
+    face_cascade = registry.get("haar")
     faces = face_cascade.detectMultiScale(
         gray,
         scaleFactor=1.1,
@@ -132,4 +148,300 @@ def analyze_sobriety(image_path: str):
             "face_region": [int(x), int(y), int(w_face), int(h_face)],  # ← int()
             **analysis
         }
-    }
\ No newline at end of file
+    }
+
+def _analyze_sobriety_fast(image):
+    """
+    Same analysis as analyze_sobriety(fast=False), but:
+    - face detection runs on a copy capped at SOBRIETY_DETECT_MAX_SIDE
+      (boxes are mapped back to full resolution)
+    - both eye ROIs are scored together without per-channel float copies
+    """
+    h, w = image.shape[:2]
+    faces = detect_faces_downscaled(image, Config.SOBRIETY_DETECT_MAX_SIDE)
+    if len(faces) == 0:
+        return {"error": "No face detected"}
+
+    # Use largest face
+    x, y, w_face, h_face = max(faces, key=lambda f: f[2] * f[3])
+
+    # Eyes are typically between 35% and 50% down the face,
+    # left at 25% and right at 65% of the face width
+    ey1 = int(y + 0.35 * h_face)
+    ey2 = int(y + 0.50 * h_face)
+    eye_h = ey2 - ey1
+    if eye_h < 10:
+        return {"error": "Face too small for eye analysis"}
+    eye_w = int(0.20 * w_face)
+    if eye_w < MIN_EYE_WIDTH:
+        return {"error": "Face too small for reliable analysis"}
+
+    names, rois = [], []
+    for eye_name, eye_x in (("left", x + int(0.25 * w_face)), ("right", x + int(0.65 * w_face))):
+        roi = image[ey1:ey2, eye_x:eye_x + eye_w]
+        if roi.size:
+            names.append(eye_name)
+            rois.append(roi)
+    if not rois:
+        return {"error": "Face too small for eye analysis"}
+
+    # Redness (Red vs Green/Blue) for both eyes at once; ROIs clipped by the
+    # image border can differ in shape, so only stack when they match
+    if all(r.shape == rois[0].shape for r in rois):
+        stacked = np.stack(rois)
+        red_ratio = (stacked[..., 2] / (stacked.sum(axis=-1, dtype=np.float32) + 1e-5)).mean(axis=(1, 2))
+    else:
+        red_ratio = np.array([(r[..., 2] / (r.sum(axis=-1, dtype=np.float32) + 1e-5)).mean() for r in rois])
+    redness = np.minimum(red_ratio * 2.0, 1.0)  # Normalize to ~0–1
+    droop_ratio = eye_w / (eye_h + 1e-5)
+
+    flags = []
+    analysis = {}
+    for eye_name, redness_score in zip(names, redness):
+        analysis[f"{eye_name}_redness"] = float(round(redness_score, 2))
+        analysis[f"{eye_name}_droop_ratio"] = float(round(droop_ratio, 2))
+        if redness_score > REDNESS_THRESHOLD:
+            flags.append(f"{eye_name}_red_eye")
+        if droop_ratio > DROOP_THRESHOLD_RATIO:
+            flags.append(f"{eye_name}_droopy_eye")
+
+    return {
+        "is_sober": len(flags) == 0,
+        "flags": list(set(flags)),
+        "image_analysis": {
+            "total_faces_detected": len(faces),
+            "face_region": [int(x), int(y), int(w_face), int(h_face)],
+            **analysis
+        }
+    }
+
+
+# ——————————————————————
+# Multi-frame mode: detect once, track after
+# ——————————————————————
+def detect_faces_downscaled(image, max_side):
+    """
+    Run Haar detection on a copy of image (gray or BGR) resized so its
+    longest side is at most max_side, and map the boxes back to
+    full-resolution coordinates. BGR input is resized before the
+    grayscale conversion so the full-size frame is never converted.
+    """
+    h, w = image.shape[:2]
+    scale = min(1.0, max_side / max(h, w))
+    small = image if scale == 1.0 else cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    min_face = max(24, int(100 * scale))
+
+    faces = registry.get("haar").detectMultiScale(
+        small,
+        scaleFactor=1.1,
+        minNeighbors=5,
+        minSize=(min_face, min_face)
+    )
+    return [tuple(int(round(v / scale)) for v in face) for face in faces]
+
+
+def _track_face(small_prev, small, box, scale):
+    """
+    Follow a face box from small_prev into small with template matching in
+    a search window around the previous position. Both are grayscale
+    frames already downscaled by scale; box is in full-resolution pixels.
+    Returns (new_box, match_score).
+    """
+    x, y, w_face, h_face = box
+    sx, sy, sw, sh = (int(v * scale) for v in box)
+
+    template = small_prev[sy:sy + sh, sx:sx + sw]
+    pad_x, pad_y = sw // 2, sh // 2
+    wx1, wy1 = max(0, sx - pad_x), max(0, sy - pad_y)
+    wx2, wy2 = min(small.shape[1], sx + sw + pad_x), min(small.shape[0], sy + sh + pad_y)
+    window = small[wy1:wy2, wx1:wx2]
+    if template.size == 0 or window.shape[0] < sh or window.shape[1] < sw:
+        return box, 0.0
+
+    scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, (mx, my) = cv2.minMaxLoc(scores)
+    new_x = int(round((wx1 + mx) / scale))
+    new_y = int(round((wy1 + my) / scale))
+    return (new_x, new_y, w_face, h_face), float(score)
+
+
+def _summary(values):
+    return {
+        "mean": round(float(values.mean()), 3),
+        "median": round(float(np.median(values)), 3),
+        "std": round(float(values.std()), 3),
+        "min": round(float(values.min()), 3),
+        "max": round(float(values.max()), 3)
+    }
+
+
+def analyze_sobriety_frames(frames):
+    """
+    Multi-frame sobriety check for a short burst of BGR frames (or frames
+    decoded from a clip):
+    - Detect the face once on a downscaled frame
+    - Track the face box across the remaining frames (template matching),
+      re-detecting only if tracking is lost
+    - Compute eye redness for every frame and both eyes in one NumPy pass
+    - Flag on the median across frames, which is sturdier than one photo
+    Returns the same shape as analyze_sobriety().
+    """
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        return {"error": "No frames to analyze"}
+
+    # All frames share the first frame's size
+    h, w = frames[0].shape[:2]
+    frames = [f if f.shape[:2] == (h, w) else cv2.resize(f, (w, h)) for f in frames]
+    grays = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in frames]
+
+    max_side = Config.SOBRIETY_DETECT_MAX_SIDE
+    scale = min(1.0, max_side / max(h, w))
+    # Tracking runs on downscaled grays; each frame is resized once and
+    # carried forward as the next step's template source
+    small_size = (int(w * scale), int(h * scale))
+    smalls = [g if scale == 1.0 else cv2.resize(g, small_size, interpolation=cv2.INTER_AREA) for g in grays]
+
+    # ——————————————————————
+    # 1. Detect once (first frame with a face)
+    # ——————————————————————
+    start, faces = None, []
+    for i, gray in enumerate(grays[:3]):
+        faces = detect_faces_downscaled(gray, max_side)
+        if faces:
+            start = i
+            break
+    if start is None:
+        return {"error": "No face detected"}
+
+    box = max(faces, key=lambda f: f[2] * f[3])
+    x, y, w_face, h_face = box
+
+    eye_h = int(0.50 * h_face) - int(0.35 * h_face)
+    eye_w = int(0.20 * w_face)
+    if eye_h < 10:
+        return {"error": "Face too small for eye analysis"}
+    if eye_w < MIN_EYE_WIDTH:
+        return {"error": "Face too small for reliable analysis"}
+
+    # ——————————————————————
+    # 2. Track across the remaining frames
+    # ——————————————————————
+    boxes, used = [box], [start]
+    redetections = 0
+    for i in range(start + 1, len(frames)):
+        new_box, score = _track_face(smalls[used[-1]], smalls[i], boxes[-1], scale)
+        if score < Config.SOBRIETY_TRACK_MIN_SCORE:
+            found = detect_faces_downscaled(grays[i], max_side)
+            redetections += 1
+            if not found:
+                continue  # Drop frames where the face is lost
+            fx, fy, _, _ = max(found, key=lambda f: f[2] * f[3])
+            new_box = (fx, fy, w_face, h_face)  # Keep ROI size fixed so frames stack
+        boxes.append(new_box)
+        used.append(i)
+
+    # ——————————————————————
+    # 3. Eye ROIs for every frame → one array (frames, eyes, h, w, 3)
+    # ——————————————————————
+    rois = []
+    for i, (bx, by, _, _) in zip(used, boxes):
+        frame = frames[i]
+        top = min(max(0, int(by + 0.35 * h_face)), h - eye_h)
+        eyes = []
+        for offset in (0.25, 0.65):
+            ex = min(max(0, bx + int(offset * w_face)), w - eye_w)
+            eyes.append(frame[top:top + eye_h, ex:ex + eye_w])
+        rois.append(eyes)
+    rois = np.asarray(rois, dtype=np.float32)
+
+    # Redness (Red vs Green/Blue) per frame and eye, normalized to ~0–1
+    red_ratio = (rois[..., 2] / (rois.sum(axis=-1) + 1e-5)).mean(axis=(2, 3))
+    redness = np.minimum(red_ratio * 2.0, 1.0)
+    droop_ratio = eye_w / (eye_h + 1e-5)
+
+    # ——————————————————————
+    # 4. Aggregate
+    # ——————————————————————
+    flags = []
+    analysis = {}
+    for idx, eye_name in enumerate(("left", "right")):
+        stats = _summary(redness[:, idx])
+        analysis[f"{eye_name}_redness"] = stats["median"]
+        analysis[f"{eye_name}_redness_stats"] = stats
+        analysis[f"{eye_name}_droop_ratio"] = float(round(droop_ratio, 2))
+        if stats["median"] > REDNESS_THRESHOLD:
+            flags.append(f"{eye_name}_red_eye")
+        if droop_ratio > DROOP_THRESHOLD_RATIO:
+            flags.append(f"{eye_name}_droopy_eye")
+
+    return {
+        "is_sober": len(flags) == 0,
+        "flags": flags,
+        "image_analysis": {
+            "mode": "multi_frame",
+            "frames_received": len(frames),
+            "frames_analyzed": len(boxes),
+            "redetections": redetections,
+            "total_faces_detected": len(faces),
+            "face_region": [int(x), int(y), int(w_face), int(h_face)],
+            **analysis
+        }
+    }
+
+
+def decode_video_frames(data, max_frames, max_side, max_seconds=None):
+    """
+    Decode up to max_frames frames, spread evenly over the first max_seconds
+    of a short video clip, downscaled so the longest side is at most max_side.
+    Frames are reached by seeking, so decoding cost does not grow with the
+    length of the upload.
+    OpenCV can only open videos from a path, so the clip is spooled to a
+    temporary file that is removed straight after decoding.
+    """
+    import tempfile
+
+    def _fit(frame):
+        fh, fw = frame.shape[:2]
+        scale = min(1.0, max_side / max(fh, fw))
+        if scale < 1.0:
+            frame = cv2.resize(frame, (int(fw * scale), int(fh * scale)), interpolation=cv2.INTER_AREA)
+        return frame
+
+    # delete=False and closed before VideoCapture opens it: Windows cannot
+    # reopen a NamedTemporaryFile by name while it is still open
+    tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+    try:
+        with tmp:
+            tmp.write(data)
+        capture = cv2.VideoCapture(tmp.name)
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+            total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            span = int(fps * max_seconds) if max_seconds else total
+            frames = []
+            if total > 0:
+                span = min(total, span) if span else total
+                for target in sorted({int(i * span / max_frames) for i in range(max_frames)}):
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, target)
+                    ok, frame = capture.read()
+                    if ok:
+                        frames.append(_fit(frame))
+            else:
+                # Frame count unknown (e.g. some WebM files): read in order, bounded by span
+                span = span or max_frames
+                step = max(1, span // max_frames)
+                index = 0
+                while len(frames) < max_frames and index < span and capture.grab():
+                    if index % step == 0:
+                        ok, frame = capture.retrieve()
+                        if ok:
+                            frames.append(_fit(frame))
+                    index += 1
+        finally:
+            capture.release()
+    finally:
+        os.remove(tmp.name)
+    return frames
@@ -0,0 +1,84 @@
+# utils/sobriety_baseline.py
+import math
+
+# Per-check values tracked in the baseline (both eyes averaged). droop_ratio
+# is left out: it is the aspect ratio of the Haar eye box, which is fixed by
+# the detector, so its spread is always zero.
+BASELINE_METRICS = ("redness",)
+
+
+def check_metrics(image_analysis):
+    """{"redness": ...} for one check, averaged over the eyes found."""
+    metrics = {}
+    for metric in BASELINE_METRICS:
+        values = [image_analysis[f"{eye}_{metric}"] for eye in ("left", "right") if f"{eye}_{metric}" in image_analysis]
+        if values:
+            metrics[metric] = sum(values) / len(values)
+    return metrics
+
+
+def update_baseline(baseline, metrics, is_sober, timestamp):
+    """
+    Fold one check into the user's baseline with Welford's algorithm.
+    Each metric keeps only {"n", "mean", "m2"}, so the stored summary stays
+    the same size however many checks the user has done.
+    Returns a new baseline dict (the input is not modified); metrics no
+    longer in BASELINE_METRICS are dropped. "count" goes up by one on every
+    update, so writers use it as the version for conditional updates.
+    """
+    baseline = baseline or {}
+    stats = {name: dict(values) for name, values in baseline.get("metrics", {}).items() if name in BASELINE_METRICS}
+    for name, value in metrics.items():
+        s = stats.setdefault(name, {"n": 0, "mean": 0.0, "m2": 0.0})
+        s["n"] += 1
+        delta = value - s["mean"]
+        s["mean"] += delta / s["n"]
+        s["m2"] += delta * (value - s["mean"])
+
+    return {
+        "count": baseline.get("count", 0) + 1,
+        "sober_count": baseline.get("sober_count", 0) + (1 if is_sober else 0),
+        "last_timestamp": timestamp,
+        "metrics": stats
+    }
+
+
+def _std(s):
+    return math.sqrt(s["m2"] / (s["n"] - 1)) if s["n"] > 1 else 0.0
+
+
+def deviations(baseline, metrics, min_samples):
+    """
+    z-score of each metric against the user's own baseline, for metrics
+    with at least min_samples previous checks and a non-zero spread.
+    """
+    result = {}
+    for name, value in metrics.items():
+        s = (baseline or {}).get("metrics", {}).get(name)
+        if not s or s["n"] < min_samples:
+            continue
+        std = _std(s)
+        if std > 0:
+            result[name] = round((value - s["mean"]) / std, 2)
+    return result
+
+
+def deviation_flags(z_scores, threshold):
+    """Higher redness is the impaired direction, so only upward deviations flag."""
+    return [f"{name}_above_baseline" for name, z in z_scores.items() if z > threshold]
+
+
+def summarize(baseline):
+    """Public view of a stored baseline: counts plus mean/std per metric."""
+    if not baseline:
+        return {"count": 0, "sober_count": 0, "metrics": {}}
+    return {
+        "count": baseline.get("count", 0),
+        "sober_count": baseline.get("sober_count", 0),
+        "sober_rate": round(baseline.get("sober_count", 0) / baseline["count"], 3) if baseline.get("count") else 0.0,
+        "last_timestamp": baseline.get("last_timestamp"),
+        "metrics": {
+            name: {"n": s["n"], "mean": round(s["mean"], 4), "std": round(_std(s), 4)}
+            for name, s in baseline.get("metrics", {}).items()
+        }
+    }
@@ -0,0 +1,49 @@
+# utils/sobriety_limit.py
+from datetime import datetime, timedelta
+from config import Config
+from utils.cache import TTLCache
+from utils.db import users_collection
+
+SOBRIETY_INTERVAL = timedelta(days=1)
+
+# user_id → last_sobriety_check. Only users inside their 24h window are
+# cached: that state cannot change until the window passes, whereas an
+# "allowed" answer may go stale as soon as another worker records a check.
+recent_checks = TTLCache(
+    maxsize=Config.SOBRIETY_LIMIT_CACHE_SIZE,
+    ttl=Config.SOBRIETY_LIMIT_CACHE_TTL
+)
+
+
+def get_last_check(user_id):
+    """Time of the user's last sobriety check, or None if they never did one."""
+    cached = recent_checks.get(user_id)
+    if cached is not None:
+        return cached["last_check"]
+
+    # Only the one field we need, not the whole user document
+    user = users_collection.find_one({"user_id": user_id}, {"_id": 0, "last_sobriety_check": 1})
+    last_check = user.get("last_sobriety_check") if user else None
+    if last_check and datetime.utcnow() < last_check + SOBRIETY_INTERVAL:
+        recent_checks.set(user_id, {"last_check": last_check})
+    return last_check
+
+
+def hours_until_allowed(user_id):
+    """Whole hours (at least 1) until the user may check again, or None if allowed now."""
+    last_check = get_last_check(user_id)
+    if not last_check:
+        return None
+    next_allowed = last_check + SOBRIETY_INTERVAL
+    now = datetime.utcnow()
+    if now >= next_allowed:
+        return None
+    return max(1, int((next_allowed - now).total_seconds() // 3600))
+
+
+def record_check(user_id, when):
+    recent_checks.set(user_id, {"last_check": when})
+
+
+def get_limit_stats():
+    return recent_checks.stats()
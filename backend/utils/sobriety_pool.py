@@ -0,0 +1,214 @@
+# utils/sobriety_pool.py
+import multiprocessing as mp
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from config import Config
+
+
+class PoolBusyError(Exception):
+    """Raised when SOBRIETY_POOL_MAX_PENDING analyses are already in flight."""
+
+
+class AnalysisTimeoutError(Exception):
+    """Raised when a worker does not answer within SOBRIETY_POOL_TIMEOUT seconds."""
+
+
+# ——————————————————————
+# Worker side (runs in the pool processes)
+# ——————————————————————
+def _init_worker():
+    # Load the Haar cascade once per worker, before the first request
+    from utils.model_registry import registry
+    import utils.sobriety  # noqa: F401  (registers "haar")
+    if registry.is_enabled("haar"):
+        registry.get("haar")
+
+
+def _warm(delay):
+    # Keeps a worker busy briefly so each warm-up call lands on a new process
+    time.sleep(delay)
+    return True
+
+
+def _analyze_shared(kind, name, shape, dtype):
+    """
+    Attach to the parent's shared-memory image (no copy, no file path) and
+    run the analysis on it.
+    """
+    from utils.sobriety import analyze_sobriety, analyze_sobriety_frames
+
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        pixels = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        if kind == "frames":
+            result = analyze_sobriety_frames(list(pixels))
+        else:
+            result = analyze_sobriety(pixels)
+        # Views into the buffer must be gone before it is closed
+        del pixels
+        return result
+    finally:
+        shm.close()
+
+
+# ——————————————————————
+# Parent side
+# ——————————————————————
+class SobrietyExecutor:
+    """
+    Runs sobriety analysis in a pre-warmed process pool. Images are handed
+    over as shared-memory buffers. At most max_pending analyses may be in
+    flight; further calls fail fast with PoolBusyError.
+
+    Workers are started through a forkserver (spawn where forkserver does
+    not exist, e.g. Windows), so they never fork the Flask process or its
+    threads. Like any non-fork start method, each worker re-imports the
+    entry module as __mp_main__: for app.py that imports the route modules
+    (and their module-level setup) but never creates or runs the app.
+    A pool broken by a crashed worker is rebuilt on the next call.
+    """
+
+    def __init__(self, size, timeout, max_pending):
+        self.size = size
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._restarts = 0
+
+    def start(self):
+        with self._lock:
+            if self._executor is not None:
+                return
+            if "forkserver" in mp.get_all_start_methods():
+                ctx = mp.get_context("forkserver")
+                ctx.set_forkserver_preload(["utils.sobriety"])
+            else:
+                ctx = mp.get_context("spawn")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                mp_context=ctx,
+                initializer=_init_worker
+            )
+        # Start every worker now so requests never pay for process start-up
+        warmups = [self._executor.submit(_warm, 0.2) for _ in range(self.size)]
+        for future in warmups:
+            future.result()
+
+    def _restart(self, broken):
+        """Replace a pool that a crashed worker (OOM, segfault) left broken."""
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self._restarts += 1
+                print("Sobriety pool broken by a crashed worker, restarting it")
+                broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def run(self, kind, pixels):
+        """
+        Analyze one BGR image (kind="single") or a stacked (N, H, W, 3)
+        burst of frames (kind="frames") in a worker and return its result.
+        If the pool turns out to be broken, it is rebuilt and the analysis
+        retried once.
+        """
+        if self._executor is None:
+            self.start()
+        executor = self._executor
+        try:
+            return self._run_once(executor, kind, pixels)
+        except BrokenProcessPool:
+            self._restart(executor)
+            return self._run_once(self._executor, kind, pixels)
+
+    def _run_once(self, executor, kind, pixels):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PoolBusyError("Sobriety analysis is at capacity, please retry shortly")
+
+        pixels = np.ascontiguousarray(pixels)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, pixels.nbytes))
+        np.ndarray(pixels.shape, dtype=pixels.dtype, buffer=shm.buf)[...] = pixels
+        with self._lock:
+            self._pending += 1
+
+        def _release(_):
+            # The worker may still be reading after a timeout, so the buffer
+            # and the slot are only freed once the job has really finished
+            shm.close()
+            shm.unlink()
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+            self._slots.release()
+
+        try:
+            future = executor.submit(_analyze_shared, kind, shm.name, pixels.shape, pixels.dtype.str)
+        except Exception:
+            _release(None)
+            raise
+        future.add_done_callback(_release)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise AnalysisTimeoutError(f"Sobriety analysis timed out after {self.timeout}s")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "started": self._executor is not None,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "restarts": self._restarts,
+                "timeout_seconds": self.timeout
+            }
+
+
+sobriety_executor = None
+if Config.SOBRIETY_POOL_SIZE > 0:
+    sobriety_executor = SobrietyExecutor(
+        size=Config.SOBRIETY_POOL_SIZE,
+        timeout=Config.SOBRIETY_POOL_TIMEOUT,
+        max_pending=Config.SOBRIETY_POOL_MAX_PENDING or 2 * Config.SOBRIETY_POOL_SIZE
+    )
+
+
+def run_sobriety(image=None, frames=None):
+    """
+    Analyze a single BGR image or a list of frames, in the process pool
+    when SOBRIETY_POOL_SIZE > 0 and inline otherwise.
+    """
+    if sobriety_executor is None:
+        from utils.sobriety import analyze_sobriety, analyze_sobriety_frames
+        return analyze_sobriety_frames(frames) if frames is not None else analyze_sobriety(image)
+    if frames is not None:
+        # Frames must share one shape to travel as a single buffer
+        h, w = frames[0].shape[:2]
+        frames = [f if f.shape[:2] == (h, w) else cv2.resize(f, (w, h)) for f in frames]
+        return sobriety_executor.run("frames", np.stack(frames))
+    return sobriety_executor.run("single", image)
+
+
+def get_pool_stats():
+    if sobriety_executor is None:
+        return {"enabled": False}
+    return {"enabled": True, **sobriety_executor.stats()}
@@ -0,0 +1,90 @@
+# utils/verdict_cache.py
+import copy
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+
+def dhash(image, hash_size=8):
+    """
+    64-bit difference hash of a PIL image: shrink to (hash_size+1) x hash_size
+    grayscale and record whether each pixel is brighter than its right
+    neighbour. Near-identical photos (recompressed, resized, slightly
+    re-framed) land within a few bits of each other.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+class VerdictCache:
+    """
+    Bounded LRU of (photo hash, task title) → verification result.
+    A lookup matches any stored hash for the same task within max_distance
+    bits (Hamming distance), so resubmitting the same photo reuses the verdict.
+    """
+
+    def __init__(self, maxsize=4096, max_distance=4):
+        self.maxsize = maxsize
+        self.max_distance = max_distance
+        self._entries = OrderedDict()  # (task_title, hash) → result
+        self._by_task = {}             # task_title → set of hashes
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def get(self, photo_hash, task_title):
+        with self._lock:
+            key = (task_title, photo_hash)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return copy.deepcopy(self._entries[key])
+
+            best, best_distance = None, self.max_distance + 1
+            for stored in self._by_task.get(task_title, ()):
+                distance = (stored ^ photo_hash).bit_count()
+                if distance < best_distance:
+                    best, best_distance = stored, distance
+            if best is not None:
+                key = (task_title, best)
+                self._entries.move_to_end(key)
+                self.near_hits += 1
+                return copy.deepcopy(self._entries[key])
+
+            self.misses += 1
+            return None
+
+    def set(self, photo_hash, task_title, result):
+        with self._lock:
+            key = (task_title, photo_hash)
+            self._entries[key] = copy.deepcopy(result)
+            self._entries.move_to_end(key)
+            self._by_task.setdefault(task_title, set()).add(photo_hash)
+            while len(self._entries) > self.maxsize:
+                (old_title, old_hash), _ = self._entries.popitem(last=False)
+                hashes = self._by_task.get(old_title)
+                if hashes is not None:
+                    hashes.discard(old_hash)
+                    if not hashes:
+                        del self._by_task[old_title]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.near_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "max_distance": self.max_distance,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.exact_hits + self.near_hits) / lookups, 3) if lookups else 0.0,
+            }
@@ -1,79 +1,364 @@
 # utils/verify.py
-from transformers import CLIPProcessor, CLIPModel
 from PIL import Image
-import torch
+import hashlib
 import os
+import threading
+from collections import OrderedDict
+from config import Config
+from utils.model_registry import configure_torch_threads, registry, ModelDisabledError
+from utils.verdict_cache import VerdictCache, dhash
+from utils.embedding_store import EmbeddingStore
 
-# Load model and processor (first run downloads ~500MB, then works offline)
 model_name = "openai/clip-vit-base-patch32"
-model = CLIPModel.from_pretrained(model_name)
-processor = CLIPProcessor.from_pretrained(model_name)
+CLIP_EMBED_DIM = 512  # projection size of clip-vit-base-patch32
 
-def matches_task(photo_path, task_text):
+# Fixed candidate labels every photo is compared against
+BASE_CANDIDATES = [
+    "a photo of a water bottle",
+    "a photo of shoes",
+    "a photo of a person smiling",
+    "a photo of a journal or notebook",
+    "a photo of healthy food",
+    "a photo of hands holding something",
+    "a photo of sunlight through a window",
+    "a photo of a phone on a table",
+    "a photo of someone stretching",
+    "a photo of a tree or plant"
+]
+
+THRESHOLD = 0.35  # Adjust based on testing
+
+
+def load_clip(precision=None):
+    """
+    Load model and processor (first run downloads ~500MB, then works offline)
+
+    precision (default CLIP_PRECISION):
+    - "fp32": full precision
+    - "int8": dynamic int8 quantization of the Linear layers
+    - "bf16": bfloat16 autocast, if the CPU supports it (falls back to fp32)
+    """
+    import torch
+    from transformers import CLIPProcessor, CLIPModel
+
+    precision = precision or Config.CLIP_PRECISION
+    if precision not in ("fp32", "int8", "bf16"):
+        raise ValueError(f"Unknown CLIP_PRECISION: {precision}")
+    configure_torch_threads()
+
+    model = CLIPModel.from_pretrained(model_name)
+    model.eval()
+    processor = CLIPProcessor.from_pretrained(model_name)
+
+    if precision == "int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif precision == "bf16" and not _cpu_supports_bf16():
+        print("⚠️ CPU lacks bf16 support, running CLIP in fp32")
+        precision = "fp32"
+
+    model.verify_precision = precision
+    return model, processor
+
+
+def _cpu_supports_bf16():
+    import torch
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
+
+
+def inference_context(model):
+    """
+    torch.inference_mode(), plus bf16 autocast when the model runs in bf16.
+    """
+    import contextlib
+    import torch
+    stack = contextlib.ExitStack()
+    stack.enter_context(torch.inference_mode())
+    if getattr(model, "verify_precision", "fp32") == "bf16":
+        stack.enter_context(torch.autocast("cpu", dtype=torch.bfloat16))
+    return stack
+
+
+registry.register("clip", load_clip)
+
+# Resubmitted (near-)identical photos reuse their earlier verdict
+verdict_cache = VerdictCache(
+    maxsize=Config.VERDICT_CACHE_SIZE,
+    max_distance=Config.VERDICT_CACHE_MAX_DISTANCE
+)
+
+
+# ——————————————————————
+# Text embedding caches
+# ——————————————————————
+_base_embeds = None
+_base_lock = threading.Lock()
+
+_task_embeds = OrderedDict()  # task title → normalized text embedding (LRU)
+_task_lock = threading.Lock()
+
+
+def task_prompt(task_text):
+    """
+    Task-specific candidate label, e.g. "Take a photo of your shoes" → "a photo of your shoes"
+    """
+    return f"a photo of {task_text.lower().replace('take a photo of ', '').replace('snap a picture of ', '')}"
+
+
+def encode_texts(texts, clip=None):
+    """
+    Run CLIP's text tower once and return L2-normalized fp32 embeddings.
+    """
+    model, processor = clip or registry.get("clip")
+    inputs = processor(text=texts, return_tensors="pt", padding=True)
+    with inference_context(model):
+        embeds = model.get_text_features(**inputs).float()
+        return embeds / embeds.norm(p=2, dim=-1, keepdim=True)
+
+
+def get_base_text_embeds():
+    """
+    Embeddings of BASE_CANDIDATES, computed once per process.
+    """
+    global _base_embeds
+    if _base_embeds is None:
+        with _base_lock:
+            if _base_embeds is None:
+                _base_embeds = encode_texts(BASE_CANDIDATES)
+    return _base_embeds
+
+
+def cache_task_prompt(task_text):
+    """
+    Encode the task-specific prompt and keep it keyed by task title.
+    Called when a task is assigned so verification only needs the vision tower.
+    """
+    with _task_lock:
+        if task_text in _task_embeds:
+            _task_embeds.move_to_end(task_text)
+            return _task_embeds[task_text]
+
+    embed = encode_texts([task_prompt(task_text)])[0]
+
+    with _task_lock:
+        _task_embeds[task_text] = embed
+        _task_embeds.move_to_end(task_text)
+        while len(_task_embeds) > Config.CLIP_TASK_EMBED_CACHE_SIZE:
+            _task_embeds.popitem(last=False)
+    return embed
+
+
+def encode_images(images, clip=None):
+    """
+    Run CLIP's vision tower on a list of PIL images and return L2-normalized fp32 embeddings.
+    """
+    model, processor = clip or registry.get("clip")
+    inputs = processor(images=images, return_tensors="pt")
+    with inference_context(model):
+        embeds = model.get_image_features(**inputs).float()
+        return embeds / embeds.norm(p=2, dim=-1, keepdim=True)
+
+
+def verdict_from_embedding(image_embed, task_text, text_embeds=None, clip=None):
+    """
+    Compare one normalized image embedding against the task prompt and the
+    base candidates. Same scoring as CLIPModel's logits_per_image.
+    text_embeds (task prompt first, then BASE_CANDIDATES) defaults to the
+    cached embeddings.
+    """
+    import torch
+    model, _ = clip or registry.get("clip")
+    candidates = [task_prompt(task_text)] + BASE_CANDIDATES
+    if text_embeds is None:
+        text_embeds = torch.cat([cache_task_prompt(task_text).unsqueeze(0), get_base_text_embeds()])
+
+    with torch.inference_mode():
+        logits = model.logit_scale.exp().float() * image_embed @ text_embeds.T
+        probs = logits.softmax(dim=-1).numpy()
+
+    # Get best match
+    best_idx = probs.argmax()
+    best_match = candidates[best_idx]
+    confidence = float(probs[best_idx])
+
+    verified = confidence > THRESHOLD and best_idx == 0  # Must match *its own* task best
+
+    reason = f"Best match: '{best_match}' (confidence: {confidence:.3f})"
+
+    return {
+        "verified": bool(verified),
+        "confidence": round(confidence, 3),
+        "best_match": best_match,
+        "reason": reason
+    }
+
+
+def matches_task(photo, task_text, meta=None):
     """
     Uses local CLIP model to check if image matches the task description.
+    photo is a file path or a decoded PIL image; meta (e.g. user_id,
+    task_id) is recorded with approved photos in the embedding store.
     Returns: {"verified": True/False, "confidence": 0.95, "reason": "..."}
     """
-    if not os.path.exists(photo_path):
-        return {"verified": False, "error": "Photo not found"}
+    return matches_task_batch([(photo, task_text, meta)])[0]
 
-    try:
-        # Open image
-        image = Image.open(photo_path).convert("RGB")
-
-        # Define candidate labels based on task
-        base_candidates = [
-            "a photo of a water bottle",
-            "a photo of shoes",
-            "a photo of a person smiling",
-            "a photo of a journal or notebook",
-            "a photo of healthy food",
-            "a photo of hands holding something",
-            "a photo of sunlight through a window",
-            "a photo of a phone on a table",
-            "a photo of someone stretching",
-            "a photo of a tree or plant"
-        ]
-
-        # Add task-specific candidate
-        custom_candidate = f"a photo of {task_text.lower().replace('take a photo of ', '').replace('snap a picture of ', '')}"
-        candidates = [custom_candidate] + base_candidates
-
-        # Prepare inputs
-        inputs = processor(
-            text=candidates,
-            images=image,
-            return_tensors="pt",
-            padding=True
-        )
-
-        # Forward pass
-        with torch.no_grad():
-            outputs = model(**inputs)
-            logits_per_image = outputs.logits_per_image  # image-to-text similarity
-            probs = logits_per_image.softmax(dim=1).squeeze().numpy()
-
-        # Get best match
-        best_idx = probs.argmax()
-        best_match = candidates[best_idx]
-        confidence = float(probs[best_idx])
-
-        # Decide threshold
-        THRESHOLD = 0.35  # Adjust based on testing
-        verified = confidence > THRESHOLD and best_idx == 0  # Must match *its own* task best
-
-        reason = f"Best match: '{best_match}' (confidence: {confidence:.3f})"
-
-        return {
-            "verified": verified,
-            "confidence": round(confidence, 3),
-            "best_match": best_match,
-            "reason": reason
+
+def matches_task_batch(items):
+    """
+    Verify several (photo, task_text[, meta]) items with a single
+    vision-tower pass. Returns one result dict per item, in order; a bad
+    photo only fails its own item. Items that failed during model
+    inference (not a verdict on the photo) carry "infra_error": True.
+    """
+    items = [(item[0], item[1], item[2] if len(item) > 2 else None) for item in items]
+    results = [None] * len(items)
+    images, positions = [], []
+
+    for i, (photo, _, _) in enumerate(items):
+        # Already-decoded images (see utils/image_ingest.py) skip the disk round trip
+        if isinstance(photo, Image.Image):
+            images.append(photo)
+            positions.append(i)
+            continue
+        if not os.path.exists(photo):
+            results[i] = {"verified": False, "error": "Photo not found"}
+            continue
+        try:
+            # Open image
+            images.append(Image.open(photo).convert("RGB"))
+            positions.append(i)
+        except Exception as e:
+            print("Local verification error:", str(e))
+            results[i] = {"verified": False, "error": str(e)}
+
+    # Serve near-duplicate resubmissions from the verdict cache. With the
+    # embedding store on, approved hits still go through the reuse check
+    # below, since a resubmitted photo is exactly what it should flag.
+    store = get_embedding_store()
+    hashes, cached_verdicts = {}, {}
+    if Config.VERDICT_CACHE_ENABLED:
+        pending_images, pending_positions = [], []
+        for image, i in zip(images, positions):
+            hashes[i] = dhash(image)
+            cached = verdict_cache.get(hashes[i], items[i][1])
+            if cached is None:
+                pending_images.append(image)
+                pending_positions.append(i)
+            elif store and cached["verified"]:
+                cached_verdicts[i] = cached
+                pending_images.append(image)
+                pending_positions.append(i)
+            else:
+                results[i] = cached
+        images, positions = pending_images, pending_positions
+
+    if not images:
+        return results
+
+    # Reuse stored embeddings for photos seen before; encode the rest in one pass
+    content_keys = {i: content_key(image) for image, i in zip(images, positions)} if store else {}
+    embeds = {}
+    if store:
+        for i in positions:
+            row = store.find(content_keys[i])
+            if row is not None:
+                embeds[i] = store.get(row)
+
+    to_encode = [(image, i) for image, i in zip(images, positions) if i not in embeds]
+    if to_encode:
+        try:
+            encoded = encode_images([image for image, _ in to_encode])
+        except ModelDisabledError:
+            raise
+        except Exception as e:
+            print("Local verification error:", str(e))
+            for _, i in to_encode:
+                results[i] = _inference_error(e)
+            to_encode = []
+            encoded = []
+        for (_, i), embed in zip(to_encode, encoded):
+            embeds[i] = embed.numpy()
+
+    for i in positions:
+        if i not in embeds:
+            continue
+        try:
+            import torch
+            if i in cached_verdicts:
+                results[i] = cached_verdicts[i]
+            else:
+                results[i] = verdict_from_embedding(torch.from_numpy(embeds[i]), items[i][1])
+                if i in hashes:
+                    # Cached before the reuse check: its matches belong to this submitter only
+                    verdict_cache.set(hashes[i], items[i][1], results[i])
+            if store and results[i]["verified"]:
+                _record_approved(store, embeds[i], content_keys[i], items[i][1], items[i][2], results[i])
+        except Exception as e:
+            print("Local verification error:", str(e))
+            results[i] = _inference_error(e)
+    return results
+
+
+def _inference_error(e):
+    return {"verified": False, "error": str(e), "infra_error": True}
+
+
+# ——————————————————————
+# Approved-photo embedding store
+# ——————————————————————
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_embedding_store():
+    """
+    Process-wide EmbeddingStore, or None when EMBEDDING_STORE_ENABLED is off.
+    """
+    global _store
+    if not Config.EMBEDDING_STORE_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = EmbeddingStore(Config.EMBEDDING_STORE_DIR, dim=CLIP_EMBED_DIM)
+    return _store
+
+
+def content_key(image):
+    """
+    Exact-content key of a decoded image (pixels + size).
+    """
+    digest = hashlib.sha1(image.tobytes())
+    digest.update(f"{image.size}".encode())
+    return digest.hexdigest()
+
+
+def _record_approved(store, embed, key, task_text, meta, result):
+    """
+    Flag approved photos that closely match a photo approved for another
+    task or user, then store the embedding (once per distinct photo).
+    """
+    meta = meta or {}
+    owner = (meta.get("user_id"), meta.get("task_id"))
+    matches = [
+        {
+            "user_id": m["meta"].get("user_id"),
+            "task_id": m["meta"].get("task_id"),
+            "similarity": m["similarity"]
         }
+        for m in store.search(embed, k=Config.REUSE_SEARCH_K)
+        if m["similarity"] >= Config.REUSE_SIMILARITY_THRESHOLD
+        and (m["meta"].get("user_id"), m["meta"].get("task_id")) != owner
+    ]
+    if matches:
+        result["possible_reuse"] = True
+        result["reuse_matches"] = matches
+
+    if store.find(key) is None:
+        store.append(embed, {"content_key": key, "task_title": task_text, **meta})
+
 
-    except Exception as e:
-        print("Local verification error:", str(e))
-        return {
-            "verified": False,
-            "error": str(e)
-        }
\ No newline at end of file
+def get_verdict_cache_stats():
+    return {"enabled": Config.VERDICT_CACHE_ENABLED, **verdict_cache.stats()}
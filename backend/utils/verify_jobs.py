@@ -0,0 +1,257 @@
+# utils/verify_jobs.py
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from config import Config
+from utils.batching import MicroBatcher
+from utils.db import users_collection, verification_jobs_collection
+from utils.verify import matches_task_batch
+
+# Queued photos are verified together in one CLIP vision pass
+verify_batcher = MicroBatcher(
+    matches_task_batch,
+    max_batch_size=Config.VERIFY_BATCH_SIZE,
+    window_ms=Config.VERIFY_BATCH_WINDOW_MS,
+    max_queue=Config.VERIFY_MAX_QUEUE,
+    workers=Config.VERIFY_WORKERS,
+    name="verify-batcher"
+)
+
+
+def apply_verification(user_id, task_id, task, photo_url, verification, streak=0):
+    """
+    Record a verification result on the user's task (status, badge, streak).
+    Returns (response_body, http_status) for the submitter.
+    A result that failed during model inference (infra_error) is not a
+    verdict: the task is left alone and 503 is returned.
+    """
+    if verification.get("infra_error"):
+        return {
+            "status": "error",
+            "message": "Photo verification is temporarily unavailable, please retry",
+            "error": verification.get("error")
+        }, 503
+
+    if not verification["verified"]:
+        users_collection.update_one(
+            {"user_id": user_id, "tasks.task_id": task_id},
+            {
+                "$set": {
+                    "tasks.$.status": "rejected",
+                    "tasks.$.photo_url": photo_url,
+                    "tasks.$.feedback": verification.get("reason", "Photo does not match task"),
+                    "tasks.$.verified_at": datetime.now(timezone.utc)
+                }
+            }
+        )
+        return {
+            "status": "rejected",
+            "message": "Photo verification failed",
+            "reason": verification.get("reason", "Does not match task"),
+            "confidence": verification.get("confidence", 0)
+        }, 400
+
+    # ✅ Approved! Finalize task
+    badge_name = task["badge"]
+    badge_image = f"static/badges/{badge_name.lower().replace(' ', '_')}.png"
+    os.makedirs("static/badges", exist_ok=True)
+
+    approved_fields = {
+        "tasks.$.status": "approved",
+        "tasks.$.photo_url": photo_url,
+        "tasks.$.completed_at": datetime.now(timezone.utc),
+        "tasks.$.ai_verified": True,
+        "tasks.$.confidence": verification["confidence"]
+    }
+    # Photo closely matches one approved for another task/user
+    if verification.get("possible_reuse"):
+        approved_fields["tasks.$.reuse_matches"] = verification["reuse_matches"]
+
+    users_collection.update_one(
+        {"user_id": user_id, "tasks.task_id": task_id},
+        {
+            "$set": approved_fields,
+            "$push": {
+                "badges": {
+                    "badge": badge_name,
+                    "image": badge_image,
+                    "earned_at": datetime.now(timezone.utc)
+                }
+            },
+            "$inc": {"streak": 1}
+        }
+    )
+
+    return {
+        "status": "approved",
+        "badge_awarded": badge_name,
+        "photo_url": photo_url,
+        "streak": streak + 1,
+        "message": "Great job! Your task was verified and approved 🎉",
+        "confidence": verification["confidence"]
+    }, 200
+
+
+def enqueue_verification(user_id, task_id, task, photo, photo_url, streak=0):
+    """
+    Queue a photo (decoded PIL image or file path) for batched verification
+    and return the job id.
+    Raises utils.batching.QueueFullError when the queue is at VERIFY_MAX_QUEUE.
+    """
+    job_id = f"job_{uuid.uuid4().hex}"
+    now = datetime.now(timezone.utc)
+    # A stale "verifying" task is resubmitted from the status it had before
+    previous_status = task["status"]
+    if previous_status == "verifying":
+        previous_status = task.get("previous_status", "pending")
+        if task.get("verification_job"):
+            expire_job(task["verification_job"])
+
+    # Record the job and block resubmissions before the photo is queued,
+    # so a fast result can never be overwritten by these writes
+    verification_jobs_collection.insert_one({
+        "_id": job_id,
+        "user_id": user_id,
+        "task_id": task_id,
+        "status": "queued",
+        "previous_status": previous_status,
+        "created_at": now
+    })
+    users_collection.update_one(
+        {"user_id": user_id, "tasks.task_id": task_id},
+        {"$set": {
+            "tasks.$.status": "verifying",
+            "tasks.$.previous_status": previous_status,
+            "tasks.$.verification_job": job_id,
+            "tasks.$.verifying_since": now
+        }}
+    )
+
+    try:
+        future = verify_batcher.submit((photo, task["title"], {"user_id": user_id, "task_id": task_id}))
+    except Exception:
+        verification_jobs_collection.delete_one({"_id": job_id})
+        _restore_task(user_id, task_id, job_id, previous_status)
+        raise
+
+    def _on_done(fut):
+        # Claim the job; one already expired as lost (expire_job) is left alone
+        claimed = verification_jobs_collection.find_one_and_update(
+            {"_id": job_id, "status": "queued"},
+            {"$set": {"status": "recording"}}
+        )
+        if claimed is None:
+            print(f"Verification job {job_id} finished after it was expired, result dropped")
+            return
+        try:
+            verification = fut.result()
+            if verification.get("infra_error"):
+                raise RuntimeError(verification.get("error"))
+        except Exception as e:
+            # Infrastructure failure (model disabled, inference error, worker
+            # crash): not the user's fault, so the task goes back to where it was
+            print("Async verification error:", str(e))
+            _restore_task(user_id, task_id, job_id, previous_status)
+            verification_jobs_collection.update_one(
+                {"_id": job_id},
+                {"$set": {
+                    "status": "failed",
+                    "error": f"Verification unavailable: {e}",
+                    "http_status": 503,
+                    "completed_at": datetime.now(timezone.utc)
+                }}
+            )
+            return
+        try:
+            body, http_status = apply_verification(user_id, task_id, task, photo_url, verification, streak)
+            verification_jobs_collection.update_one(
+                {"_id": job_id},
+                {"$set": {
+                    "status": "done",
+                    "result": body,
+                    "http_status": http_status,
+                    "completed_at": datetime.now(timezone.utc)
+                }}
+            )
+        except Exception as e:
+            print("Failed to record verification job:", str(e))
+            _restore_task(user_id, task_id, job_id, previous_status)
+            verification_jobs_collection.update_one(
+                {"_id": job_id},
+                {"$set": {"status": "failed", "error": str(e), "completed_at": datetime.now(timezone.utc)}}
+            )
+
+    future.add_done_callback(_on_done)
+    return job_id
+
+
+def _restore_task(user_id, task_id, job_id, status):
+    """Put a task still held by job_id back to the status it had before it was queued."""
+    users_collection.update_one(
+        {"user_id": user_id, "tasks": {"$elemMatch": {
+            "task_id": task_id, "status": "verifying", "verification_job": job_id
+        }}},
+        {"$set": {"tasks.$.status": status}}
+    )
+
+
+def is_stale_verification(task):
+    """
+    True when a task has been "verifying" for longer than
+    VERIFY_JOB_STALE_SECONDS, i.e. its job was lost (process restart,
+    crash) and the task may be resubmitted.
+    """
+    if task.get("status") != "verifying":
+        return False
+    since = task.get("verifying_since")
+    if since is None:
+        return True  # predates job tracking
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - since > timedelta(seconds=Config.VERIFY_JOB_STALE_SECONDS)
+
+
+def expire_job(job_id):
+    """Mark a still-queued job as lost. Returns True if it was queued."""
+    result = verification_jobs_collection.update_one(
+        {"_id": job_id, "status": "queued"},
+        {"$set": {
+            "status": "failed",
+            "error": "Verification job was lost (server restarted), please resubmit",
+            "completed_at": datetime.now(timezone.utc)
+        }}
+    )
+    return result.modified_count > 0
+
+
+def recover_stale_jobs():
+    """
+    Expire jobs queued more than VERIFY_JOB_STALE_SECONDS ago (their
+    in-memory queue is gone) and put their tasks back to the status they
+    had before. Run at startup; safe with several processes, since live
+    jobs finish well within the limit. Returns the number of jobs expired.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.VERIFY_JOB_STALE_SECONDS)
+    expired = 0
+    for job in verification_jobs_collection.find({"status": "queued", "created_at": {"$lt": cutoff}}):
+        if expire_job(job["_id"]):
+            _restore_task(job["user_id"], job["task_id"], job["_id"], job.get("previous_status", "pending"))
+            expired += 1
+    if expired:
+        print(f"Expired {expired} stale verification job(s)")
+    return expired
+
+
+def get_job(job_id):
+    job = verification_jobs_collection.find_one({"_id": job_id})
+    if not job:
+        return None
+    job["job_id"] = job.pop("_id")
+    for field in ("created_at", "completed_at"):
+        if job.get(field):
+            job[field] = job[field].isoformat()
+    return job
+
+
+def get_queue_stats():
+    return verify_batcher.stats()
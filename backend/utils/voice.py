@@ -1,22 +1,161 @@
-import speech_recognition as sr
-from pydub import AudioSegment
-import os
-
-def convert_voice_to_text(audio_file_path):
-    # Convert audio to WAV if needed
-    if audio_file_path.endswith('.ogg') or audio_file_path.endswith('.mp3'):
-        audio = AudioSegment.from_file(audio_file_path)
-        wav_path = audio_file_path.rsplit('.', 1)[0] + ".wav"
-        audio.export(wav_path, format="wav")
-        audio_file_path = wav_path
-
-    recognizer = sr.Recognizer()
-    with sr.AudioFile(audio_file_path) as source:
-        audio = recognizer.record(source)
-        try:
-            text = recognizer.recognize_google(audio)
-            return text
-        except sr.UnknownValueError:
-            return "Could not understand audio"
-        except sr.RequestError:
-            return "Could not request results"
\ No newline at end of file
+# utils/voice.py
+import subprocess
+import numpy as np
+from config import Config
+from utils.batching import MicroBatcher
+from utils.model_registry import configure_torch_threads, registry, ModelDisabledError
+
+SAMPLE_RATE = 16000  # What both engines expect: 16 kHz mono 16-bit
+TRANSCRIPTION_FAILED = "Could not request results"  # Same text the Google backend returns
+
+
+class InvalidAudioError(ValueError):
+    """Raised when a voice note cannot be decoded."""
+
+
+class AudioTooLongError(ValueError):
+    """Raised when a voice note is larger or longer than the configured limits."""
+
+
+class AudioDecoderUnavailableError(RuntimeError):
+    """Raised when ffmpeg cannot be run on this server; not the client's fault."""
+
+
+def decode_audio(data, max_seconds=None):
+    """
+    Transcode voice-note bytes (.ogg, .mp3, .webm, .wav, ...) to 16 kHz mono
+    float32 samples in [-1, 1] by piping them through ffmpeg. Nothing is
+    written to disk.
+
+    ffmpeg stops after max_seconds (+ a small margin), so an oversized
+    clip is never decoded past the limit; it is rejected instead.
+    """
+    cmd = [Config.FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error", "-i", "pipe:0"]
+    if max_seconds:
+        cmd += ["-t", str(max_seconds + 0.1)]
+    cmd += ["-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"]
+
+    try:
+        proc = subprocess.run(cmd, input=data, capture_output=True, timeout=Config.VOICE_DECODE_TIMEOUT)
+    except OSError as e:
+        print(f"Could not run {Config.FFMPEG_BINARY}: {e}")
+        raise AudioDecoderUnavailableError("Voice notes cannot be processed right now")
+    except subprocess.TimeoutExpired:
+        raise InvalidAudioError("Timed out decoding voice note")
+    if proc.returncode != 0 or not proc.stdout:
+        raise InvalidAudioError(f"Could not decode voice note: {proc.stderr.decode(errors='ignore').strip()[:200]}")
+
+    samples = np.frombuffer(proc.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+    if max_seconds and len(samples) > max_seconds * SAMPLE_RATE:
+        raise AudioTooLongError(f"Voice note is longer than {max_seconds} seconds")
+    return samples
+
+
+# ——————————————————————
+# Engines
+# ——————————————————————
+class GoogleASR:
+    """Google Web Speech API through speech_recognition (needs network)."""
+
+    def transcribe(self, clips):
+        import speech_recognition as sr
+        recognizer = sr.Recognizer()
+        texts = []
+        for samples in clips:
+            pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+            try:
+                texts.append(recognizer.recognize_google(sr.AudioData(pcm, SAMPLE_RATE, 2)))
+            except sr.UnknownValueError:
+                texts.append("Could not understand audio")
+            except sr.RequestError:
+                texts.append(TRANSCRIPTION_FAILED)
+        return texts
+
+
+class WhisperASR:
+    """
+    Local Whisper on CPU through the transformers ASR pipeline.
+    Clips longer than ASR_CHUNK_SECONDS are split into overlapping chunks
+    and stitched back together by the pipeline; several clips are
+    transcribed in one batched call.
+    """
+
+    def __init__(self, model_name, chunk_seconds):
+        from transformers import pipeline
+        configure_torch_threads()
+        self.pipe = pipeline(
+            "automatic-speech-recognition",
+            model=model_name,
+            chunk_length_s=chunk_seconds,
+            device=-1
+        )
+
+    def transcribe(self, clips):
+        inputs = [{"raw": samples, "sampling_rate": SAMPLE_RATE} for samples in clips]
+        outputs = self.pipe(inputs, batch_size=len(inputs))
+        return [out["text"].strip() for out in outputs]
+
+
+def load_asr(backend=None):
+    """
+    Build the speech-to-text engine for the configured backend:
+    - "whisper": local Whisper model (ASR_MODEL), no network needed
+    - "google": Google Web Speech API
+    """
+    backend = backend or Config.ASR_BACKEND
+    if backend == "whisper":
+        return WhisperASR(Config.ASR_MODEL, Config.ASR_CHUNK_SECONDS)
+    if backend == "google":
+        return GoogleASR()
+    raise ValueError(f"Unknown ASR_BACKEND: {backend}")
+
+
+# Loaded lazily on first use (or during warmup)
+registry.register("asr", load_asr)
+
+
+def _transcribe_batch(clips):
+    return registry.get("asr").transcribe(clips)
+
+
+# Batches concurrent voice notes into one pipeline call
+asr_batcher = MicroBatcher(
+    _transcribe_batch,
+    max_batch_size=Config.ASR_MAX_BATCH_SIZE,
+    window_ms=Config.ASR_BATCH_WINDOW_MS,
+    name="asr-batcher"
+)
+
+
+def transcribe_clips(clips):
+    """Transcribe several decoded clips (float32 16 kHz mono) in one call."""
+    if not clips:
+        return []
+    return _transcribe_batch(clips)
+
+
+def convert_voice_to_text(data):
+    """
+    Transcribe voice-note bytes. Raises AudioTooLongError for uploads over
+    VOICE_MAX_BYTES (checked before decoding) or VOICE_MAX_SECONDS, and
+    InvalidAudioError when the bytes are not audio, and
+    AudioDecoderUnavailableError when ffmpeg is missing. If the engine itself
+    fails (model load, inference, full queue), the transcript is
+    TRANSCRIPTION_FAILED, as it always was for the Google backend.
+    """
+    if Config.VOICE_MAX_BYTES and len(data) > Config.VOICE_MAX_BYTES:
+        raise AudioTooLongError(f"Voice note is larger than {Config.VOICE_MAX_BYTES // (1024 * 1024)} MB")
+    samples = decode_audio(data, Config.VOICE_MAX_SECONDS)
+    try:
+        if Config.ASR_BATCHING:
+            return asr_batcher(samples)
+        return transcribe_clips([samples])[0]
+    except ModelDisabledError:
+        raise
+    except Exception as e:
+        print(f"Speech-to-text error ({Config.ASR_BACKEND}): {e}")
+        return TRANSCRIPTION_FAILED
+
+
+def get_asr_stats():
+    return {"backend": Config.ASR_BACKEND, "batching": Config.ASR_BATCHING, **asr_batcher.stats()}
@@ -9,6 +9,8 @@ function BlogManagement() {
   const [excerpt, setExcerpt] = useState('');
   const [link, setLink] = useState('');
   const [editingId, setEditingId] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [toast, setToast] = useState({ show: false, msg: '', type: 'info' });
   const username = localStorage.getItem('username');
 
@@ -22,25 +24,35 @@ function BlogManagement() {
     }
   }, [toast.show]);
 
-  // Fetch blogs
-  useEffect(() => {
-    const fetchBlogs = async () => {
-      try {
-        const res = await fetch('/api/admin/blogs');
-        if (res.ok) {
-          const data = await res.json();
-          setBlogs(data.slice(0, 5));
-        } else {
-          setToast({ show: true, msg: 'Failed to load blogs', type: 'error' });
-        }
-      } catch (err) {
-        console.error('Fetch error:', err);
-        setToast({ show: true, msg: 'Network error', type: 'error' });
+  // Fetch one page of blogs; with a cursor, the page is appended
+  const fetchBlogs = async (cursor = null) => {
+    const query = cursor ? `?limit=5&cursor=${encodeURIComponent(cursor)}` : '?limit=5';
+    try {
+      const res = await fetch(`/api/admin/blogs${query}`);
+      if (res.ok) {
+        const data = await res.json();
+        setBlogs((prev) => (cursor ? [...prev, ...data.blogs] : data.blogs));
+        setNextCursor(data.next_cursor || null);
+      } else {
+        setToast({ show: true, msg: 'Failed to load blogs', type: 'error' });
       }
-    };
+    } catch (err) {
+      console.error('Fetch error:', err);
+      setToast({ show: true, msg: 'Network error', type: 'error' });
+    }
+  };
+
+  useEffect(() => {
     fetchBlogs();
   }, []);
 
+  // Load the next page
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    await fetchBlogs(nextCursor);
+    setLoadingMore(false);
+  };
+
   // Edit existing blog
   const handleEdit = (blog) => {
     setTitle(blog.title);
@@ -230,9 +242,9 @@ function BlogManagement() {
                   ))}
                 </div>
 
-                {/* Bottom Row: 3 Cards */}
+                {/* Bottom Row: 3 Cards, then any loaded with "Load more" */}
                 <div className="blog-row bottom">
-                  {blogs.slice(2, 5).map((blog) => (
+                  {blogs.slice(2).map((blog) => (
                     <div key={blog._id} className="blog-card">
                       <h3>{blog.title}</h3>
                       <p className="blog-excerpt">{blog.excerpt}</p>
@@ -260,6 +272,17 @@ function BlogManagement() {
                   ))}
                 </div>
               </div>
+
+              {nextCursor && (
+                <button
+                  type="button"
+                  className="btn btn-secondary load-more"
+                  onClick={handleLoadMore}
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              )}
             </div>
           </div>
         </div>
@@ -48,8 +48,14 @@ function ChatInterface() {
     setInput('');
     setLoading(true);
 
+    // Show the reply as it streams in
+    const setBotText = (text) =>
+      setMessages((prev) =>
+        prev.map((msg, i) => (i === prev.length - 1 ? { ...msg, bot: text } : msg))
+      );
+
     try {
-      const res = await fetch('http://localhost:5000/api/chat', {
+      const res = await fetch('http://localhost:5000/api/chat/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
@@ -58,16 +64,35 @@ function ChatInterface() {
         }),
       });
 
-      if (res.ok) {
-        const data = await res.json();
-        setMessages((prev) =>
-          prev.map((msg, i) =>
-            i === prev.length - 1 ? { ...msg, bot: data.reply } : msg
-          )
-        );
-      } else {
+      if (!res.ok || !res.body) {
         throw new Error("Server error");
       }
+
+      // Parse Server-Sent Events: "data: {...}" frames separated by blank lines
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let reply = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split('\n\n');
+        buffer = frames.pop();
+        for (const frame of frames) {
+          const isDone = frame.startsWith('event: done');
+          const dataLine = frame.split('\n').find((line) => line.startsWith('data: '));
+          if (!dataLine) continue;
+          const payload = JSON.parse(dataLine.slice(6));
+          if (isDone) {
+            reply = payload.reply;
+          } else {
+            reply += payload.delta;
+          }
+          setLoading(false);
+          setBotText(reply);
+        }
+      }
     } catch (err) {
       console.error("Chat request failed:", err);
       setMessages((prev) => [
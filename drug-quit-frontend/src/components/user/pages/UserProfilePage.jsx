@@ -162,7 +162,8 @@ function UserProfilePage() {
     formData.append('selfie', selfie);
 
     try {
-      const res = await fetch('http://localhost:5000/api/sobriety-check', {
+      // user_id in the URL lets the server refuse a repeat check before the upload
+      const res = await fetch(`http://localhost:5000/api/sobriety-check?user_id=${encodeURIComponent(userId)}`, {
         method: 'POST',
         body: formData,
       });